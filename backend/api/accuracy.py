@@ -0,0 +1,168 @@
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from core.config import (
+    accuracy_status, FORECAST_LOG_STEPS, ACCURACY_MIN_FORECASTS, ACCURACY_STALE_RATIO
+)
+from core.state_manager import STATE_DIR
+
+# Layout of the forecast log:
+#   state/forecast_log/{symbol}_{interval}.bin -> one fixed-size record per computed forecast
+# Records are only ever appended; the "accuracy" status of the series keeps
+# how many of them have been scored, so each update reads only new ones.
+FORECAST_LOG_DIR = Path(STATE_DIR) / "forecast_log"
+RECORD = np.dtype([
+    ("bar_time", "<i8"),     # last bar the forecast was computed from, ns since epoch
+    ("logged_at", "<i8"),
+    ("version", "S32"),      # model version, empty for legacy models
+    ("n_steps", "<u2"),
+    ("predictions", "<f4", (FORECAST_LOG_STEPS,)),
+])
+
+
+def accuracy_key(symbol, interval):
+    return f"{symbol}:{interval}"
+
+
+def log_path(symbol, interval):
+    return FORECAST_LOG_DIR / f"{symbol}_{interval}.bin"
+
+
+def log_forecast(symbol, interval, model_version, bar_timestamp, predictions):
+    """Append a forecast to the log of its series"""
+    record = np.zeros(1, dtype=RECORD)
+    steps = min(len(predictions), FORECAST_LOG_STEPS)
+    record["bar_time"] = pd.Timestamp(bar_timestamp).value
+    record["logged_at"] = pd.Timestamp.now().value
+    record["version"] = (model_version or "").encode()
+    record["n_steps"] = steps
+    record["predictions"][0, :steps] = predictions[:steps]
+    FORECAST_LOG_DIR.mkdir(parents=True, exist_ok=True)
+    # Small appends are atomic, so workers can share a log
+    with open(log_path(symbol, interval), "ab") as f:
+        f.write(record.tobytes())
+
+
+def _new_state(version):
+    return {
+        "version": version,
+        "cursor": 0,
+        "last_forecast": None,
+        "forecasts": 0,
+        "expired": 0,
+        "count": [0] * FORECAST_LOG_STEPS,
+        "abs_error": [0.0] * FORECAST_LOG_STEPS,
+        "abs_pct_error": [0.0] * FORECAST_LOG_STEPS,
+    }
+
+
+def update_accuracy(symbol, interval, bars):
+    """Score the logged forecasts whose steps have all closed in `bars` since the last update
+
+    Running sums per step are all that is kept, so the cost is proportional
+    to the forecasts logged since the previous call. The newest bar may still
+    be forming and is never used as an actual value.
+    """
+    path = log_path(symbol, interval)
+    if not path.exists() or len(bars) < 2:
+        return None
+    key = accuracy_key(symbol, interval)
+    state = accuracy_status.get(key) or _new_state(None)
+    total = path.stat().st_size // RECORD.itemsize
+    if total <= state["cursor"]:
+        return state
+
+    records = np.fromfile(path, dtype=RECORD, count=total - state["cursor"], offset=state["cursor"] * RECORD.itemsize)
+    times = bars.index.as_unit("ns").asi8
+    closes = bars["close"].to_numpy(dtype=np.float64)
+    last_closed = len(times) - 2
+    count, abs_error, abs_pct_error = (np.asarray(state[k], dtype=np.float64) for k in ("count", "abs_error", "abs_pct_error"))
+
+    scored = 0
+    for record in records:
+        pos = np.searchsorted(times, record["bar_time"])
+        if pos == len(times):
+            # Computed from bars newer than these
+            break
+        if times[pos] != record["bar_time"]:
+            # Its bar is older than the bars at hand or missing from them; it can never be scored
+            state["expired"] += 1
+            scored += 1
+            continue
+        n = int(record["n_steps"])
+        if pos + n > last_closed:
+            # Not all steps have closed; neither have those of later forecasts
+            break
+        scored += 1
+
+        version = record["version"].decode() or None
+        identity = [int(record["bar_time"]), version]
+        if identity == state["last_forecast"]:
+            # Same forecast computed by another worker
+            continue
+        if version != state["version"]:
+            if state["version"] is not None and (version or "") < state["version"]:
+                continue
+            # A newer model: its accuracy starts from scratch
+            cursor = state["cursor"]
+            state = _new_state(version)
+            state["cursor"] = cursor
+            count, abs_error, abs_pct_error = (np.zeros(FORECAST_LOG_STEPS) for _ in range(3))
+
+        actual = closes[pos + 1:pos + 1 + n]
+        error = np.abs(record["predictions"][:n].astype(np.float64) - actual)
+        count[:n] += 1
+        abs_error[:n] += error
+        abs_pct_error[:n] += error / np.abs(actual) * 100
+        state["forecasts"] += 1
+        state["last_forecast"] = identity
+
+    if scored:
+        state.update(
+            cursor=state["cursor"] + scored,
+            count=count.astype(int).tolist(),
+            abs_error=abs_error.tolist(),
+            abs_pct_error=abs_pct_error.tolist(),
+            updated_at=datetime.now().isoformat()
+        )
+        accuracy_status[key] = state
+    return state
+
+
+def live_accuracy(symbol, interval):
+    """Realized MAE and MAPE per forecast step of the latest model served, or None"""
+    state = accuracy_status.get(accuracy_key(symbol, interval))
+    if state is None or not state["forecasts"]:
+        return None
+    count = np.asarray(state["count"], dtype=np.float64)
+    steps = int(np.count_nonzero(count))
+    count = count[:steps]
+    return {
+        "interval": interval,
+        "version": state["version"],
+        "forecasts": state["forecasts"],
+        "mae": np.round(np.asarray(state["abs_error"][:steps]) / count, 4).tolist(),
+        "mape": np.round(np.asarray(state["abs_pct_error"][:steps]) / count, 4).tolist(),
+        "updated_at": state.get("updated_at"),
+    }
+
+
+def staleness(manifest, accuracy):
+    """Whether the live error of a model has drifted well past its test error, and why"""
+    if accuracy is None or accuracy["version"] != manifest.get("version"):
+        return False, "no scored forecasts for this version yet"
+    if accuracy["forecasts"] < ACCURACY_MIN_FORECASTS:
+        return False, f"{accuracy['forecasts']} of {ACCURACY_MIN_FORECASTS} scored forecasts"
+    test_mape = (manifest.get("metrics") or {}).get("MAPE")
+    if not test_mape:
+        return False, "no test MAPE to compare with"
+
+    # The test split scores the trained horizon only, so compare those steps
+    horizon = manifest.get("prediction_horizon") or 1
+    live_mape = float(np.mean(accuracy["mape"][:horizon]))
+    if live_mape > ACCURACY_STALE_RATIO * test_mape:
+        return True, f"live MAPE {live_mape:.3f}% is above {ACCURACY_STALE_RATIO:g}x the test MAPE {test_mape:.3f}%"
+    return False, f"live MAPE {live_mape:.3f}% vs test MAPE {test_mape:.3f}%"
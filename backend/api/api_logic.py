@@ -1,10 +1,40 @@
 import os
+import time
+import asyncio
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
 import httpx
+import numpy as np
+import pandas as pd
+from datetime import datetime, timedelta
 from fastapi import HTTPException
 
 import tensorflow as tf
 import joblib  
-from core.config import model_cache, scaler_cache, feature_cache 
+from core.config import (
+    logger, model_cache, scaler_cache, feature_cache, manifest_cache, model_usage, prediction_cache,
+    preload_status, PRELOAD_SYMBOLS, PRELOAD_MRU_COUNT, UPSTREAM_CALLS_PER_MINUTE,
+    INFERENCE_MAX_BATCH_SIZE, bar_store, BASE_INTERVAL, state_backend, WATCHLIST, ALPHA_VANTAGE_URL,
+    MEMORY_CEILING_MB, MEMORY_TRACEMALLOC_TOP
+)
+from core.memory import MemoryTracker
+from core.metrics import export_stages
+from core.profiling import profiles_thread
+from api.inference_worker import inference_worker
+from api.accuracy import log_forecast, update_accuracy
+from model.artifacts import has_bundle, load_bundle, read_current_version
+from model.indicators import compute_features
+from model.predict import predict_future_prices, get_prediction_horizon, sample_future_prices, summarize_samples
+from utils.fetch_data import process_data
+from utils.rate_limit import RateLimiter
+from utils.resample import INTERVAL_MINUTES, can_resample, resample_ohlcv
+
+# Shared by background jobs that call Alpha Vantage so they stay inside the quota
+upstream_limiter = RateLimiter(UPSTREAM_CALLS_PER_MINUTE)
+
+# Feature engineering and scaling run here so they never block the event loop;
+# one thread per request that can share a batch on the inference worker.
+forecast_executor = ThreadPoolExecutor(max_workers=INFERENCE_MAX_BATCH_SIZE, thread_name_prefix="forecast")
 
 async def get_api_key():
     """Get API key from environment"""
@@ -30,17 +60,26 @@ def load_model_artifacts(symbol: str):
         
         cache_key = symbol
         if cache_key in model_cache:
-            return model_cache[cache_key], scaler_cache[cache_key], feature_cache[cache_key]
+            # Another worker may have retrained or replaced this model
+            published = state_backend.get_model_version(symbol)
+            if published is None or published == get_model_version(symbol):
+                return model_cache[cache_key], scaler_cache[cache_key], feature_cache[cache_key]
+            evict_model(symbol)
         
         # Load from disk
-        model = tf.keras.models.load_model(f"{model_dir}/lstm_model.h5", compile=False)
-        scaler = joblib.load(f"{model_dir}/scaler.pkl")
-        feature_columns = joblib.load(f"{model_dir}/feature_columns.pkl")
-        print(model.summary())  # Debugging line
+        if has_bundle(symbol):
+            model, scaler, feature_columns, manifest = load_bundle(symbol)
+        else:
+            # Models trained before versioned bundles existed
+            model = tf.keras.models.load_model(f"{model_dir}/lstm_model.h5", compile=False)
+            scaler = joblib.load(f"{model_dir}/scaler.pkl")
+            feature_columns = joblib.load(f"{model_dir}/feature_columns.pkl")
+            manifest = {"symbol": symbol, "version": None, "features": feature_columns}
         # Cache for future use
         model_cache[cache_key] = model
         scaler_cache[cache_key] = scaler
         feature_cache[cache_key] = feature_columns
+        manifest_cache[cache_key] = manifest
         
         return model, scaler, feature_columns
         
@@ -50,9 +89,285 @@ def load_model_artifacts(symbol: str):
             detail=f"Error loading model artifacts: {str(e)}"
         )
 
-async def fetch_stock_data_async(symbol: str, interval: str, api_key: str):
-    """Async version of stock data fetching"""
-    url = 'https://www.alphavantage.co/query'
+def evict_model(symbol: str):
+    """Drop every cached artifact and forecast of a symbol in this worker"""
+    for cache in (model_cache, scaler_cache, feature_cache, manifest_cache):
+        cache.pop(symbol, None)
+    invalidate_forecasts(symbol)
+
+def record_model_use(symbol: str):
+    """Remember when a symbol's model was last served (drives MRU preloading)"""
+    model_usage[symbol] = datetime.now().isoformat()
+
+def warm_up_model(model):
+    """Run one dummy forward pass so the predict graph is traced"""
+    _, sequence_length, n_features = model.input_shape
+    dummy = np.zeros((1, sequence_length, n_features), dtype=np.float32)
+    model.predict_on_batch(dummy)
+
+def get_preload_symbols():
+    """Configured symbols first, then the most recently used ones"""
+    recent = sorted(model_usage, key=model_usage.get, reverse=True)[:PRELOAD_MRU_COUNT]
+    symbols = []
+    for symbol in PRELOAD_SYMBOLS + recent:
+        if symbol not in symbols:
+            symbols.append(symbol)
+    return symbols
+
+def preload_models(symbols):
+    """Load and warm up models; meant to run in a background thread"""
+    preload_status.update({"state": "loading", "symbols": symbols, "started_at": datetime.now().isoformat()})
+    for symbol in symbols:
+        try:
+            start = time.perf_counter()
+            model, _, _ = load_model_artifacts(symbol)
+            warm_up_model(model)
+            preload_status["loaded"].append(symbol)
+            logger.info(f"Preloaded {symbol} in {time.perf_counter() - start:.2f}s")
+        except HTTPException as e:
+            preload_status["failed"][symbol] = e.detail
+        except Exception as e:
+            preload_status["failed"][symbol] = str(e)
+    preload_status.update({"state": "ready", "completed_at": datetime.now().isoformat()})
+
+def next_bar_close(now, interval):
+    """Wall-clock time at which the bar currently forming will close"""
+    minutes = INTERVAL_MINUTES[interval]
+    bar_start = now.replace(second=0, microsecond=0) - timedelta(minutes=now.minute % minutes)
+    return bar_start + timedelta(minutes=minutes)
+
+def get_model_version(symbol: str):
+    """Version of the model currently served for a symbol (None for legacy models)"""
+    manifest = manifest_cache.get(symbol)
+    if manifest is not None:
+        return manifest["version"]
+    return read_current_version(symbol)
+
+def forecast_key(symbol: str, interval: str):
+    return f"{symbol}:{interval}"
+
+def get_cached_forecast(symbol: str, interval: str, model_version, steps: int, bar_timestamp=None,
+                        confidence_samples=None):
+    """Cached forecast for this model and interval covering at least `steps`, if still current.
+
+    Without `bar_timestamp` the entry is only trusted until its bar closes; with
+    it, the entry is valid as long as it was computed from that same last bar.
+    """
+    entry = prediction_cache.get(forecast_key(symbol, interval))
+    if symbol in WATCHLIST and (entry is None or datetime.now() >= entry["valid_until"]):
+        # Precomputed by whichever worker runs the watchlist scheduler
+        entry = load_shared_forecast(symbol, interval) or entry
+    if entry is None or entry["model_version"] != model_version or entry["steps"] < steps:
+        return None
+    if confidence_samples and not covers(entry["confidence"], steps, confidence_samples):
+        return None
+    if bar_timestamp is None:
+        if datetime.now() >= entry["valid_until"]:
+            return None
+    elif entry["bar_timestamp"] != bar_timestamp:
+        return None
+    else:
+        entry["valid_until"] = next_bar_close(datetime.now(), entry["interval"])
+    entry["hits"] += 1
+    return entry
+
+def covers(bands, steps, samples):
+    """Whether confidence bands span `steps` and were drawn from at least `samples` samples"""
+    return bands is not None and bands["samples"] >= samples and len(bands["mean"]) >= steps
+
+def store_forecast(symbol: str, model_version, bar_timestamp, predictions, interval: str,
+                   source="on_demand", valid_until=None, prediction_horizon=1, confidence=None):
+    """Cache a fresh forecast, by default until the next bar closes
+
+    A forecast from the same model and last bar as the cached one is merged
+    into it: the longer predictions and the wider-covering bands are kept,
+    so a short request does not evict a longer forecast.
+    """
+    now = datetime.now()
+    previous = prediction_cache.get(forecast_key(symbol, interval))
+    if (previous is not None and previous["model_version"] == model_version
+            and previous["bar_timestamp"] == bar_timestamp):
+        # Deterministic forward passes: the shorter forecast is a prefix of the longer one
+        if previous["steps"] > len(predictions):
+            predictions = previous["predictions"]
+        if previous["confidence"] is not None and (
+            confidence is None
+            or covers(previous["confidence"], len(confidence["mean"]), confidence["samples"])
+        ):
+            confidence = previous["confidence"]
+    entry = {
+        "model_version": model_version,
+        "bar_timestamp": bar_timestamp,
+        "interval": interval,
+        "steps": len(predictions),
+        "predictions": [float(p) for p in predictions],
+        "generated_at": now.isoformat(),
+        "valid_until": valid_until or next_bar_close(now, interval),
+        "source": source,
+        "prediction_horizon": prediction_horizon,
+        "confidence": confidence,
+        "hits": 0,
+    }
+    prediction_cache[forecast_key(symbol, interval)] = entry
+    # Scored against the bars that follow once they have closed
+    log_forecast(symbol, interval, model_version, bar_timestamp, entry["predictions"])
+    if source == "watchlist":
+        shared = dict(entry, bar_timestamp=bar_timestamp.isoformat(), valid_until=entry["valid_until"].isoformat())
+        state_backend.set_status("forecast", forecast_key(symbol, interval), shared)
+    return entry
+
+def load_shared_forecast(symbol: str, interval: str):
+    """Watchlist forecast published to the shared state backend, if any"""
+    shared = state_backend.get_status("forecast", forecast_key(symbol, interval))
+    if shared is None:
+        return None
+    entry = dict(
+        shared,
+        bar_timestamp=pd.Timestamp(shared["bar_timestamp"]),
+        valid_until=datetime.fromisoformat(shared["valid_until"]),
+        hits=0
+    )
+    prediction_cache[forecast_key(symbol, interval)] = entry
+    return entry
+
+def forecast_freshness(forecast):
+    """How old a cached forecast is and where it came from"""
+    generated_at = datetime.fromisoformat(forecast["generated_at"])
+    return {
+        "source": forecast["source"],
+        "bar_timestamp": forecast["bar_timestamp"].isoformat(),
+        "generated_at": forecast["generated_at"],
+        "age_seconds": round((datetime.now() - generated_at).total_seconds(), 1),
+        "valid_until": forecast["valid_until"].isoformat(),
+    }
+
+def invalidate_forecasts(symbol: str):
+    """Drop the cached forecasts of every interval of a symbol"""
+    for key in [k for k in prediction_cache if k.startswith(f"{symbol}:")]:
+        prediction_cache.pop(key, None)
+
+def get_model_horizon(symbol: str, model):
+    """Trained prediction horizon from the manifest, else read off the output layer"""
+    manifest = manifest_cache.get(symbol) or {}
+    return manifest.get("prediction_horizon") or get_prediction_horizon(model)
+
+@profiles_thread
+def compute_forecast(model, scaler, feature_columns, df, steps, prediction_horizon, confidence_samples=None):
+    """Indicators, scaling and the forecast itself; forward passes go through the inference worker"""
+    # Only the indicators this model was trained on are computed
+    features = compute_features(df, feature_columns)
+    features = features[~np.isnan(features).any(axis=1)]
+    
+    # Prepare data for prediction (same arithmetic as MinMaxScaler.transform)
+    sequence_length = model.input_shape[1]
+    last_sequence = features[-sequence_length:] * scaler.scale_ + scaler.min_
+    
+    predictions = predict_future_prices(
+        model, scaler, last_sequence, feature_columns, steps=steps,
+        predict_fn=lambda batch: inference_worker.predict(model, batch),
+        prediction_horizon=prediction_horizon
+    )
+    if not confidence_samples:
+        return predictions, None
+    
+    sampled = sample_future_prices(
+        model, scaler, last_sequence, feature_columns, steps=steps, samples=confidence_samples,
+        predict_fn=lambda batch: inference_worker.predict(model, batch, stochastic=True),
+        prediction_horizon=prediction_horizon
+    )
+    bands = {name: [float(v) for v in values] for name, values in summarize_samples(sampled).items()}
+    bands["samples"] = confidence_samples
+    return predictions, bands
+
+async def get_forecast(symbol: str, steps: int, interval="5min", refresh=False,
+                       source="on_demand", valid_until=None, confidence_samples=None):
+    """Forecast `steps` bars ahead, reusing the cached forecast whenever it is still current"""
+    model, scaler, feature_columns = load_model_artifacts(symbol)
+    model_version = get_model_version(symbol)
+    
+    forecast = None if refresh else get_cached_forecast(
+        symbol, interval, model_version, steps, confidence_samples=confidence_samples
+    )
+    if forecast is not None:
+        return forecast
+    
+    # Only forecasts that are computed are accounted; cache hits cost nothing
+    memory = MemoryTracker(MEMORY_CEILING_MB, MEMORY_TRACEMALLOC_TOP)
+    with memory.stage("fetch"):
+        df = await get_stock_bars(symbol, interval)
+    bar_timestamp = df.index[-1]
+    # Bars closed since the last call settle earlier forecasts
+    update_accuracy(symbol, interval, df)
+    
+    forecast = get_cached_forecast(
+        symbol, interval, model_version, steps, bar_timestamp=bar_timestamp, confidence_samples=confidence_samples
+    )
+    if forecast is not None:
+        if valid_until is not None:
+            forecast["valid_until"] = valid_until
+        return forecast
+    
+    prediction_horizon = get_model_horizon(symbol, model)
+    loop = asyncio.get_running_loop()
+    context = contextvars.copy_context()
+    with memory.stage("forecast"):
+        predictions, confidence = await loop.run_in_executor(
+            forecast_executor, context.run, compute_forecast,
+            model, scaler, feature_columns, df, steps, prediction_horizon, confidence_samples
+        )
+    export_stages("predict", memory.stages)
+    return store_forecast(
+        symbol, model_version, bar_timestamp, predictions, interval,
+        source=source, valid_until=valid_until, prediction_horizon=prediction_horizon,
+        confidence=confidence
+    )
+
+_bar_locks = {}
+
+async def get_stock_bars(symbol: str, interval: str, api_key=None):
+    """OHLCV bars at `interval`, built locally from the finest interval fetched so far.
+
+    Only one series per symbol is kept (BASE_INTERVAL unless a finer one was
+    asked for). It is fetched again once a bar of the requested interval has
+    closed since the last download. Each interval is resampled once per
+    download, off the event loop; callers must not modify the frame.
+    """
+    if interval not in INTERVAL_MINUTES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid interval '{interval}'. Valid intervals: {list(INTERVAL_MINUTES)}"
+        )
+    
+    lock = _bar_locks.setdefault(symbol, asyncio.Lock())
+    async with lock:
+        entry = bar_store.get(symbol)
+        now = datetime.now()
+        if (
+            entry is None
+            or not can_resample(entry["interval"], interval)
+            or next_bar_close(entry["fetched_at"], interval) <= now
+        ):
+            fetch_interval = BASE_INTERVAL if can_resample(BASE_INTERVAL, interval) else interval
+            if entry is not None and can_resample(entry["interval"], fetch_interval) and entry["interval"] != fetch_interval:
+                fetch_interval = entry["interval"]
+            raw_data = await fetch_stock_data_async(symbol, fetch_interval, api_key or await get_api_key())
+            bars = await asyncio.to_thread(process_data, raw_data)
+            entry = {"interval": fetch_interval, "bars": bars, "fetched_at": now, "resampled": {}}
+            bar_store[symbol] = entry
+        
+        resampled = entry["resampled"].get(interval)
+        if resampled is None:
+            resampled = await asyncio.to_thread(resample_ohlcv, entry["bars"], entry["interval"], interval)
+            entry["resampled"][interval] = resampled
+    
+    return resampled
+
+async def fetch_stock_data_async(symbol: str, interval: str, api_key: str, month: str = None):
+    """Async version of stock data fetching
+
+    `month` ("YYYY-MM") asks for that whole month instead of the most recent bars.
+    """
+    url = ALPHA_VANTAGE_URL
     params = {
         'function': 'TIME_SERIES_INTRADAY',
         'symbol': symbol,
@@ -61,11 +376,12 @@ async def fetch_stock_data_async(symbol: str, interval: str, api_key: str):
         'outputsize': 'full',
         'datatype': 'json'
     }
+    if month:
+        params['month'] = month
     
     async with httpx.AsyncClient() as client:
         response = await client.get(url, params=params)
         data = response.json()
-        print("DEBUG: Fetched data:", data)  # Debugging line
         if 'Error Message' in data:
             raise HTTPException(status_code=400, detail=f"API Error: {data['Error Message']}")
         
@@ -1,6 +1,8 @@
-from fastapi import HTTPException, BackgroundTasks
+from fastapi import HTTPException, BackgroundTasks, Request, Response
 from fastapi import APIRouter
+from fastapi.responses import FileResponse, JSONResponse
 
+import asyncio
 from pathlib import Path
 from typing import Optional
 import joblib
@@ -8,18 +10,32 @@ from datetime import datetime,timedelta
 import os
 from dotenv import load_dotenv
 
-from utils.fetch_data import process_data
-from api.schemas import  TrainingRequest, PredictionRequest, PredictionResponse
-from api.api_logic import fetch_stock_data_async, get_api_key, load_model_artifacts
+from api.http_cache import make_etag, not_modified
+from api.reports import schedule_report, report_key, report_path, can_render
+from api.training_jobs import (
+    start_job, finish_job, run_training_process, record_memory, training_budget, lock_training, unlock_training
+)
+from api.schemas import  TrainingRequest, PredictionRequest, PredictionResponse, BackfillRequest
+from api.accuracy import live_accuracy, staleness
+from api.backfill import start_backfill, backfill_key, load_backfill, merge_bars
+from api.api_logic import (
+    get_stock_bars, record_model_use,
+    get_forecast, forecast_freshness, evict_model
+)
 
-from model.LSTM import build_lstm_model
-from model.feature_engineering import prepare_lstm_data
-from model.train_model import train_model
-from model.evaluate_model import evaluate_model,save_model_artifacts
-from model.feature_engineering import create_technical_indicators
-from model.predict import predict_future_prices
+from model.LSTM import ARCHITECTURES, DEFAULT_ARCHITECTURE
+from model.dataset_cache import prepare_dataset
+from model.predict import forecast_mode
+from utils.resample import INTERVAL_MINUTES
 
-from core.config import logger, training_status, model_cache, scaler_cache, feature_cache
+from model.artifacts import list_manifests, list_versions, read_current_version, delete_bundles
+
+from core.config import (
+    logger, training_status, model_cache, manifest_cache, state_backend, report_status, backfill_status,
+    MEMORY_CEILING_MB, MEMORY_TRACEMALLOC_TOP
+)
+from core.memory import MemoryTracker, MemoryCeilingExceeded
+from core.profiling import PROFILING_ENABLED, PROFILE_DIR, profile_requested, list_profiles
 
 load_dotenv()
 
@@ -41,26 +57,41 @@ async def root():
             "/train",
             "/predict",
             "/models",
-            "/training-status/{symbol}"
+            "/models/{symbol}/report",
+            "/models/{symbol}/training-report",
+            "/training-status/{symbol}",
+            "/backfill",
+            "/backfill-status/{symbol}"
         ]
     }
 
 @router.get("/stock-data/{symbol}")#tested-working
 async def get_stock_data(
+    request: Request,
+    response: Response,
     symbol: str="IBM",#will be replaced with a default symbol
     interval: str = "5min",
     limit: Optional[int] = 100
 ):
-    """Fetch latest stock data for a symbol"""
+    """Fetch latest stock data for a symbol
+
+    Tagged with an ETag of the last bar; a matching If-None-Match gets a 304.
+    """
     try:
-        api_key = API_KEY
-        raw_data = await fetch_stock_data_async(symbol.upper(), interval, api_key)
-        df = process_data(raw_data)
+        df = await get_stock_bars(symbol.upper(), interval, api_key=API_KEY)
         
         # Limit results if specified
         if limit:
             df = df.tail(limit)
         
+        # The last bar's values are included so the tag changes if the upstream
+        # revises its latest bar; resampled bars are always complete, since
+        # resample_ohlcv leaves out the bucket still forming
+        last_bar = (df.index[-1].isoformat(), *df.iloc[-1].tolist()) if len(df) else None
+        cached = not_modified(request, response, make_etag(symbol.upper(), interval, limit, len(df), last_bar))
+        if cached is not None:
+            return cached
+        
         # Convert to response format
         stock_data = []
         for timestamp, row in df.iterrows():
@@ -88,12 +119,19 @@ async def get_stock_data(
 @router.post("/train")#tested-working
 async def train_model_endpoint(
     request: TrainingRequest,
-    background_tasks: BackgroundTasks
+    background_tasks: BackgroundTasks,
+    http_request: Request
 ):
     """Start training a new LSTM model"""
     symbol = request.symbol.upper()
+    if request.architecture not in ARCHITECTURES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown architecture '{request.architecture}'. Use one of {list(ARCHITECTURES)}"
+        )
     
-    if symbol in training_status and training_status[symbol]["status"] == "training":
+    # One job per symbol across all workers, and within this one
+    if not lock_training(symbol):
         raise HTTPException(
             status_code=409,
             detail=f"Model training already in progress for {symbol}"
@@ -110,14 +148,17 @@ async def train_model_endpoint(
     }
     
     
-    background_tasks.add_task(
-        train_model_background,
+    training_args = (
         symbol,
         request.interval,
         request.sequence_length,
         request.prediction_horizon,
-        request.epochs
+        request.epochs,
+        request.architecture,
+        training_budget(request.max_seconds, request.max_samples_per_epoch)
     )
+    # Profiled in the training process, where the work happens
+    background_tasks.add_task(train_model_background, *training_args, profile_run=profile_requested(http_request))
     
     return {
         "message": f"Training started for {symbol}",
@@ -131,92 +172,137 @@ async def train_model_background(
     interval: str,
     sequence_length: int,
     prediction_horizon: int,
-    epochs: int
+    epochs: int,
+    architecture: str = DEFAULT_ARCHITECTURE,
+    budget: Optional[dict] = None,
+    resume: Optional[dict] = None,
+    profile_run: bool = False
 ):
-    """Background task for model training"""
+    """Background task for model training
+
+    `budget` caps the training time and windows per epoch (see
+    training_jobs.training_budget). `resume` is the saved state of an
+    interrupted job; training then continues from its last finished epoch.
+    `profile_run` runs the training process under cProfile.
+    """
+    # The API process is shared, so these peaks may include concurrent requests;
+    # the training process reports its own stages
+    memory = MemoryTracker(MEMORY_CEILING_MB, MEMORY_TRACEMALLOC_TOP)
     try:
-        training_status[symbol]["message"] = "Fetching data..."
-        training_status[symbol]["progress"] = 10.0
-        
-    
-        api_key = await get_api_key()
-        raw_data = await fetch_stock_data_async(symbol, interval, api_key)
-        df = process_data(raw_data)
-        
-      
-        training_status[symbol]["message"] = "Creating technical indicators..."
-        training_status[symbol]["progress"] = 25.0
-        
-        
-        df = create_technical_indicators(df)
-        
-        # Update status
-        training_status[symbol]["message"] = "Preparing training data..."
-        training_status[symbol]["progress"] = 40.0
-        
-        # Prepare data for LSTM
-        X_train, X_test, y_train, y_test, scaler, feature_columns = prepare_lstm_data(
-            df, sequence_length=sequence_length, prediction_horizon=prediction_horizon
-        )
-        
-        # Update status
-        training_status[symbol]["message"] = "Building model..."
-        training_status[symbol]["progress"] = 50.0
-        
+        if resume is None:
+            training_status.patch(symbol, {"message": "Fetching data...", "progress": 10.0})
+            
+            with memory.stage("fetch"):
+                df = await get_stock_bars(symbol, interval)
+                # Longer history when the symbol was backfilled; recent bars win on overlap
+                history = await asyncio.to_thread(load_backfill, symbol, interval)
+                if history is not None:
+                    df = merge_bars(history, df)
+            
+          
+            training_status.patch(symbol, {"message": "Preparing training data...", "progress": 25.0})
+            
+            # Indicators, scaling and windows; reused from disk when this exact
+            # data and configuration was prepared before. Off the event loop,
+            # since a cache miss is seconds of CPU and disk work
+            with memory.stage("prepare_dataset"):
+                X_train, X_test, y_train, y_test, scaler, feature_columns, dataset = await asyncio.to_thread(
+                    prepare_dataset, df, symbol, interval,
+                    sequence_length=sequence_length, prediction_horizon=prediction_horizon
+                )
+            record_memory(symbol, memory.stages)
+            training_status.patch(symbol, {"progress": 40.0, "dataset": dataset})
+        else:
+            # Same cached dataset as before the restart; the training process
+            # picks up weights and optimizer state from the last checkpoint
+            dataset = resume["dataset"]
         
-        model = build_lstm_model(
-            input_shape=(X_train.shape[1], X_train.shape[2]),
-            prediction_horizon=prediction_horizon
+        job = start_job(
+            symbol, interval, sequence_length, prediction_horizon, epochs, architecture, dataset,
+            budget=budget, profile_run=profile_run, resume=resume
         )
-        
        
-        training_status[symbol]["message"] = "Training model..."
-        training_status[symbol]["progress"] = 60.0
-        
-        
-        history, model_dir = train_model(
-            model, X_train, y_train, X_test, y_test, symbol, epochs=epochs
-        )
+        training_status.patch(symbol, {"message": "Training model...", "progress": 60.0})
         
+        # Build, fit, evaluate and publish in a separate process with its own
+        # CPU budget, so serving keeps its threads and cores
+        result = await run_training_process(job)
+        metrics, profile = result["metrics"], result["profile"]
         
-        training_status[symbol]["message"] = "Evaluating model..."
-        training_status[symbol]["progress"] = 90.0
-        
-        metrics, pred_prices, actual_prices = evaluate_model(
-            model, X_test, y_test, scaler, feature_columns
-        )
-        
-        save_model_artifacts(model, scaler, feature_columns, metrics, symbol, model_dir)
-        
-        cache_key = symbol
-        if cache_key in model_cache:
-            del model_cache[cache_key]
-            del scaler_cache[cache_key] 
-            del feature_cache[cache_key]
+        # Other workers drop their cached copy on their next request
+        evict_model(symbol)
+        state_backend.publish_model_version(symbol, result["version"])
         
         # Update final status
-        training_status[symbol].update({
+        training_status.patch(symbol, {
             "status": "completed",
             "progress": 100.0,
             "message": "Training completed successfully",
             "completed_at": datetime.now().isoformat(),
-            "metrics": metrics
+            "metrics": metrics,
+            "profile": profile,
+            "budget": result["budget"],
+            "version": result["version"],
+            "report_url": f"/api/models/{symbol}/training-report?version={result['version']}",
+            "profile_file": result.get("profile_file")
         })
+        finish_job(symbol)
+        # Plots are drawn afterwards by the report worker; training is done here
+        schedule_report(symbol, result["version"])
         print(f"Training completed for {symbol}")
         print("Training status:", training_status[symbol]   )
     except Exception as e:
         logger.error(f"Training failed for {symbol}: {str(e)}")
-        training_status[symbol].update({
+        record_memory(symbol, memory.stages)
+        training_status.patch(symbol, {
             "status": "failed",
             "message": f"Training failed: {str(e)}",
             "completed_at": datetime.now().isoformat()
         })
+        finish_job(symbol)
+    finally:
+        unlock_training(symbol)
+
+@router.post("/backfill")
+async def backfill_endpoint(request: BackfillRequest):
+    """Fetch the history of a symbol month by month into a local bar series
+
+    Months already on disk are skipped, so an interrupted or failed backfill
+    is continued by posting it again.
+    """
+    symbol = request.symbol.upper()
+    if request.interval not in INTERVAL_MINUTES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid interval '{request.interval}'. Valid intervals: {list(INTERVAL_MINUTES)}"
+        )
+    if request.start > request.end:
+        raise HTTPException(status_code=400, detail="start must not be after end")
+
+    if not start_backfill(symbol, request.interval, request.start, request.end):
+        raise HTTPException(
+            status_code=409,
+            detail=f"Backfill already in progress for {symbol} {request.interval}"
+        )
+    return {
+        "message": f"Backfill started for {symbol}",
+        "status": "running",
+        "symbol": symbol,
+        "check_status_url": f"/backfill-status/{symbol}?interval={request.interval}"
+    }
+
+@router.get("/backfill-status/{symbol}")
+async def get_backfill_status(symbol: str, interval: str = "5min"):
+    """Get backfill progress for a symbol and interval"""
+    key = backfill_key(symbol.upper(), interval)
+    if key not in backfill_status:
+        raise HTTPException(status_code=404, detail=f"No backfill found for {symbol.upper()} {interval}")
+    return backfill_status[key]
 
 @router.get("/training-status/{symbol}")#tested-working
 async def get_training_status(symbol: str):
     """Get training status for a symbol"""
     symbol = symbol.upper()
-    print("DEBUG",training_status)
     if symbol not in training_status:
         raise HTTPException(
             status_code=404,
@@ -232,95 +318,193 @@ async def predict_prices(request: PredictionRequest):
         symbol = request.symbol.upper()
         print(symbol)
         
-        # Load model artifacts
-        model, scaler, feature_columns = load_model_artifacts(symbol)
-        
-      
-        if request.use_latest_data:
-            api_key = await get_api_key()
-            raw_data = await fetch_stock_data_async(symbol, "5min", api_key)
-            df = process_data(raw_data)
-            df = create_technical_indicators(df)
-            
-            # Prepare data for prediction
-            df_clean = df[feature_columns].dropna()
-            scaled_data = scaler.transform(df_clean.tail(60))  # Use last 60 points
-            last_sequence = scaled_data
-        else:
+        if not request.use_latest_data:
             # Load historical data
             raise HTTPException(
                 status_code=400,
                 detail="Historical prediction not implemented. Use use_latest_data=true"
             )
         
-        # Make predictions
-        predictions = predict_future_prices(
-            model, scaler, last_sequence, feature_columns, steps=request.steps
+        # Watchlist symbols are normally answered straight from the cache
+        forecast = await get_forecast(
+            symbol, request.steps, confidence_samples=request.confidence_samples
         )
+        record_model_use(symbol)
         
         # Format predictions
         prediction_data = []
-        current_time = datetime.now()
+        current_time = datetime.fromisoformat(forecast["generated_at"])
+        bands = forecast["confidence"] if request.confidence_samples else None
         
-        for i, price in enumerate(predictions):
-            prediction_data.append({
+        for i, price in enumerate(forecast["predictions"][:request.steps]):
+            step = {
                 "step": i + 1,
                 "predicted_price": round(float(price), 2),
                 "timestamp": (current_time + timedelta(minutes=5*(i+1))).isoformat(),
-                "confidence": "medium"  # You could implement confidence intervals
-            })
-        
-        # Load model metrics
-        try:
-            metrics = joblib.load(f"models/{symbol}/metrics.pkl")
-        except:
-            metrics = None
+                "confidence": "medium"
+            }
+            if bands:
+                step.update({
+                    "confidence": f"mc_dropout ({bands['samples']} samples)",
+                    "mean": round(bands["mean"][i], 2),
+                    "p5": round(bands["p5"][i], 2),
+                    "p95": round(bands["p95"][i], 2)
+                })
+            prediction_data.append(step)
+        
+        # Test-split metrics of the served bundle (loaded with the model);
+        # legacy models kept them in metrics.pkl
+        metrics = (manifest_cache.get(symbol) or {}).get("metrics")
+        if metrics is None:
+            try:
+                metrics = joblib.load(f"LSTM_models/{symbol}/metrics.pkl")
+            except Exception:
+                metrics = None
         
         return PredictionResponse(
             symbol=symbol,
             predictions=prediction_data,
             model_metrics=metrics,
-            generated_at=datetime.now().isoformat()
+            generated_at=forecast["generated_at"],
+            cached=forecast["hits"] > 0,
+            mode=forecast_mode(forecast["prediction_horizon"], request.steps),
+            freshness=forecast_freshness(forecast)
         )
         
+    except MemoryCeilingExceeded as e:
+        logger.error(f"Prediction refused for {symbol}: {e}")
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
         logger.error(f"Prediction error: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/models")#tested-working
-async def list_available_models():
-    """List all available trained models"""
-    models_dir = Path("LSTM_models")
-    if not models_dir.exists():
-        return {"models": []}
-    
+async def list_available_models(request: Request, response: Response):
+    """List all available trained models
+
+    Each model with a bundle carries the realized accuracy of its served
+    forecasts and is flagged `stale` once that drifts well past its test
+    error. Tagged with an ETag of the bundle versions and accuracy updates;
+    a matching If-None-Match gets a 304.
+    """
     available_models = []
-    for model_dir in models_dir.iterdir():
-        if model_dir.is_dir():
-            model_info = {"symbol": model_dir.name}
-            
-            # Try to load training info
-            try:
-                training_info = joblib.load(model_dir / "training_info.pkl")
-                model_info.update(training_info)
-            except:
-                model_info["status"] = "incomplete"
-            
-            # Check if model files exist
+    for manifest in list_manifests():
+        model_info = dict(manifest)
+        if manifest["version"] is not None:
+            model_info["status"] = "ready"
+            model_info["last_trained"] = manifest["created_at"]
+            model_info["files_present"] = True
+            accuracy = live_accuracy(manifest["symbol"], manifest.get("interval", "5min"))
+            model_info["live_accuracy"] = accuracy
+            model_info["stale"], model_info["stale_reason"] = staleness(manifest, accuracy)
+        else:
+            # Pre-bundle layout: report it without unpickling anything
+            model_dir = Path("LSTM_models") / manifest["symbol"]
             required_files = ["lstm_model.h5", "scaler.pkl", "feature_columns.pkl"]
             model_info["files_present"] = all(
                 (model_dir / file).exists() for file in required_files
             )
-            
-            available_models.append(model_info)
+            if model_info["files_present"]:
+                model_info["status"] = "legacy"
+        
+        available_models.append(model_info)
     
+    cached = not_modified(request, response, make_etag(
+        [
+            (m["symbol"], m["version"], m.get("status"), m["files_present"],
+             (m.get("live_accuracy") or {}).get("updated_at"))
+            for m in available_models
+        ]
+    ))
+    if cached is not None:
+        return cached
     return {"models": available_models}
 
+# Error metrics where lower is better; R2 is the other way round
+REPORT_METRICS = ["MAPE", "RMSE", "MAE", "MSE", "R2"]
+
+@router.get("/models/{symbol}/report")
+async def model_report(symbol: str, metric: str = "MAPE", threshold: Optional[float] = None):
+    """Accuracy next to cost for every retained version of a symbol's model
+
+    `recommended` is the cheapest version (lowest single-sequence latency,
+    then fewest parameters) whose `metric` meets `threshold`.
+    """
+    symbol = symbol.upper()
+    if metric not in REPORT_METRICS:
+        raise HTTPException(status_code=400, detail=f"Unknown metric '{metric}'. Use one of {REPORT_METRICS}")
+    
+    manifests = list_versions(symbol)
+    if not manifests:
+        raise HTTPException(status_code=404, detail=f"No model found for symbol {symbol}")
+    
+    current = read_current_version(symbol)
+    versions = []
+    for manifest in manifests:
+        profile = manifest.get("profile", {})
+        versions.append({
+            "version": manifest["version"],
+            "current": manifest["version"] == current,
+            "created_at": manifest["created_at"],
+            "architecture": profile.get("architecture", manifest.get("model_architecture")),
+            "metrics": manifest["metrics"],
+            "param_count": profile.get("param_count"),
+            "epochs_trained": profile.get("epochs_trained"),
+            "epoch_seconds": profile.get("epoch_seconds"),
+            "inference_ms_p50": profile.get("inference_ms_p50"),
+            "inference_ms_p95": profile.get("inference_ms_p95"),
+            "inference_measured_with": profile.get("inference_measured_with"),
+        })
+    
+    def meets_bar(entry):
+        value = entry["metrics"].get(metric)
+        if value is None or entry["inference_ms_p50"] is None:
+            return False
+        if threshold is None:
+            return True
+        return value >= threshold if metric == "R2" else value <= threshold
+    
+    candidates = [entry for entry in versions if meets_bar(entry)]
+    recommended = min(
+        candidates, key=lambda entry: (entry["inference_ms_p50"], entry["param_count"])
+    )["version"] if candidates else None
+    
+    return {
+        "symbol": symbol,
+        "metric": metric,
+        "threshold": threshold,
+        "recommended": recommended,
+        "versions": versions
+    }
+
+@router.get("/models/{symbol}/training-report")
+async def get_training_report(symbol: str, version: Optional[str] = None):
+    """PNG training report of a model version (the current one by default)
+
+    Rendered in the background after training; 202 with the render status
+    while it is not ready yet.
+    """
+    symbol = symbol.upper()
+    version = version or read_current_version(symbol)
+    if version is None:
+        raise HTTPException(status_code=404, detail=f"No model found for {symbol}")
+
+    path = report_path(symbol, version)
+    if path.exists():
+        return FileResponse(path, media_type="image/png", filename=f"{symbol}_{version}_training_report.png")
+    if not can_render(symbol, version):
+        raise HTTPException(status_code=404, detail=f"No training report available for {symbol} version {version}")
+
+    # Also picks up reports lost to a restart or a failed render
+    schedule_report(symbol, version)
+    status = report_status.get(report_key(symbol, version)) or {"status": "pending"}
+    return JSONResponse(status_code=202, content={"symbol": symbol, "version": version, **status})
+
 @router.delete("/models/{symbol}")#tested
 async def delete_model(symbol: str):
     """Delete a trained model"""
     symbol = symbol.upper()
-    model_dir = Path(f"models/{symbol}")
+    model_dir = Path(f"LSTM_models/{symbol}")
     
     if not model_dir.exists():
         raise HTTPException(
@@ -329,20 +513,16 @@ async def delete_model(symbol: str):
         )
     
     try:
-        # Remove from cache
-        cache_key = symbol
-        if cache_key in model_cache:
-            del model_cache[cache_key]
-            del scaler_cache[cache_key]
-            del feature_cache[cache_key]
+        # Remove from cache, here and in every other worker
+        evict_model(symbol)
+        state_backend.publish_model_version(symbol, None)
         
         # Remove training status
         if symbol in training_status:
             del training_status[symbol]
         
-        # Delete directory
-        import shutil
-        shutil.rmtree(model_dir)
+        # Delete all bundles and the current pointer
+        delete_bundles(symbol)
         
         return {"message": f"Model for {symbol} deleted successfully"}
         
@@ -359,11 +539,24 @@ async def health_check():
         "status": "healthy",
         "timestamp": datetime.now().isoformat(),
         "api_key_configured": bool(os.getenv("ALPHA_VANTAGE_API_KEY")),
-        "models_available": len(list(Path("models").glob("*"))),
+        "models_available": len(list(Path("LSTM_models").glob("*"))),
         "active_trainings": len([s for s in training_status.values() if s["status"] == "training"]),
         "cache_size": len(model_cache)
     }
 
+@router.get("/admin/profiles")
+async def get_profiles():
+    """List saved profiles (pstats files under state/profiles)"""
+    return {"enabled": PROFILING_ENABLED, "profiles": list_profiles()}
+
+@router.get("/admin/profiles/{name}")
+async def download_profile(name: str):
+    """Download one pstats file"""
+    path = PROFILE_DIR / name
+    if Path(name).name != name or not path.is_file():
+        raise HTTPException(status_code=404, detail=f"No profile named {name}")
+    return FileResponse(path, media_type="application/octet-stream", filename=name)
+
 # # Error handlers
 # @router.exception_handler(HTTPException)
 # async def http_exception_handler(request, exc):
@@ -0,0 +1,201 @@
+import os
+import uuid
+import asyncio
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from fastapi import HTTPException
+
+from api.api_logic import fetch_stock_data_async, get_api_key, upstream_limiter
+from core.config import logger, backfill_status, state_backend, BACKFILL_CONCURRENCY, BACKFILL_RETRIES
+from core.state_backend import process_owner
+from core.state_manager import STATE_DIR
+from model.indicators import PRICE_VOLUME_COLUMNS
+from utils.fetch_data import process_data
+
+# Layout of a backfill:
+#   state/backfill/{symbol}_{interval}/months/{YYYY-MM}.npz -> one finished month, as fetched
+#   state/backfill/{symbol}_{interval}/bars.npz             -> all months merged, sorted, deduplicated
+# A month file is only written once the month is over, so its presence is
+# what makes a rerun skip it.
+BACKFILL_DIR = Path(STATE_DIR) / "backfill"
+BARS_FILE = "bars.npz"
+
+# Backfills running in this process, by status key
+_running = {}
+
+
+def backfill_key(symbol, interval):
+    return f"{symbol}:{interval}"
+
+
+def backfill_dir(symbol, interval):
+    return BACKFILL_DIR / f"{symbol}_{interval}"
+
+
+def month_range(start, end):
+    """["2024-01", ..., "2024-04"] for start "2024-01" and end "2024-04", inclusive"""
+    return [p.strftime("%Y-%m") for p in pd.period_range(start, end, freq="M")]
+
+
+def month_finished(month, now=None):
+    return pd.Period(month, freq="M").end_time < (now or datetime.now())
+
+
+def save_bars(df, path):
+    """Write bars as a datetime64[ns] index plus a float64 OHLCV block, atomically"""
+    tmp_path = f"{path}.{uuid.uuid4().hex[:6]}.tmp.npz"
+    np.savez(tmp_path, index=df.index.to_numpy(dtype="datetime64[ns]"), bars=df[PRICE_VOLUME_COLUMNS].to_numpy(dtype=np.float64))
+    os.replace(tmp_path, path)
+
+
+def load_bars(path):
+    with np.load(path) as f:
+        return pd.DataFrame(f["bars"], index=pd.DatetimeIndex(f["index"]), columns=PRICE_VOLUME_COLUMNS)
+
+
+def merge_bars(*frames):
+    """One sorted series without duplicate timestamps; later frames win on overlap"""
+    frames = [df[PRICE_VOLUME_COLUMNS] for df in frames if df is not None and len(df)]
+    if not frames:
+        return pd.DataFrame(columns=PRICE_VOLUME_COLUMNS, index=pd.DatetimeIndex([]))
+    merged = pd.concat(frames)
+    return merged[~merged.index.duplicated(keep="last")].sort_index()
+
+
+def load_backfill(symbol, interval):
+    """Merged backfilled bars of a symbol, or None if it was never backfilled"""
+    path = backfill_dir(symbol, interval) / BARS_FILE
+    return load_bars(path) if path.exists() else None
+
+
+async def fetch_month(symbol, interval, month, api_key):
+    """Bars of one month; retried with backoff when the upstream quota is hit"""
+    for attempt in range(BACKFILL_RETRIES + 1):
+        await upstream_limiter.acquire()
+        try:
+            raw_data = await fetch_stock_data_async(symbol, interval, api_key, month=month)
+            break
+        except HTTPException as e:
+            if e.status_code != 429 or attempt == BACKFILL_RETRIES:
+                raise
+            await asyncio.sleep(upstream_limiter.spacing * 2 ** attempt)
+    if not raw_data:
+        return merge_bars()
+    df = await asyncio.to_thread(process_data, raw_data)
+    # Only bars of the month asked for, so overlapping answers cannot leak in
+    return df[df.index.to_period("M") == pd.Period(month, freq="M")]
+
+
+async def run_backfill(symbol, interval, start, end):
+    """Fetch every month of [start, end] not on disk yet and rebuild the merged series"""
+    key = backfill_key(symbol, interval)
+    months_dir = backfill_dir(symbol, interval) / "months"
+    months_dir.mkdir(parents=True, exist_ok=True)
+    months = month_range(start, end)
+    todo = [m for m in months if not (months_dir / f"{m}.npz").exists()]
+    done, failed, partial = len(months) - len(todo), {}, []
+
+    backfill_status.patch(key, {
+        "months_total": len(months),
+        "months_done": done,
+        "months_skipped": done,
+        "progress": round(100.0 * done / len(months), 1),
+        "message": f"Fetching {len(todo)} of {len(months)} months"
+    })
+
+    try:
+        api_key = await get_api_key()
+        semaphore = asyncio.Semaphore(BACKFILL_CONCURRENCY)
+
+        async def one_month(month):
+            nonlocal done
+            async with semaphore:
+                try:
+                    df = await fetch_month(symbol, interval, month, api_key)
+                except Exception as e:
+                    failed[month] = getattr(e, "detail", str(e))
+                    logger.error(f"Backfill of {symbol} {interval} {month} failed: {failed[month]}")
+                    return
+            if month_finished(month):
+                save_bars(df, months_dir / f"{month}.npz")
+            else:
+                # Still filling up; merged now, fetched again by the next run
+                partial.append(df)
+            done += 1
+            backfill_status.patch(key, {
+                "months_done": done,
+                "months_failed": failed,
+                "progress": round(100.0 * done / len(months), 1),
+                "message": f"Fetched {month}"
+            })
+
+        await asyncio.gather(*(one_month(m) for m in todo))
+
+        backfill_status.patch(key, {"message": "Merging months..."})
+        bars = await asyncio.to_thread(
+            lambda: merge_bars(
+                load_backfill(symbol, interval),
+                *(load_bars(months_dir / f"{m}.npz") for m in months if (months_dir / f"{m}.npz").exists()),
+                *partial
+            )
+        )
+        if len(bars):
+            await asyncio.to_thread(save_bars, bars, backfill_dir(symbol, interval) / BARS_FILE)
+
+        backfill_status.patch(key, {
+            "status": "failed" if failed else "completed",
+            "message": f"{len(failed)} months failed; run again to retry them" if failed else "Backfill completed",
+            "months_failed": failed,
+            "bars": len(bars),
+            "first_bar": bars.index[0].isoformat() if len(bars) else None,
+            "last_bar": bars.index[-1].isoformat() if len(bars) else None,
+            "completed_at": datetime.now().isoformat()
+        })
+    except Exception as e:
+        logger.error(f"Backfill of {symbol} {interval} failed: {e}")
+        backfill_status.patch(key, {
+            "status": "failed",
+            "message": f"Backfill failed: {getattr(e, 'detail', str(e))}",
+            "completed_at": datetime.now().isoformat()
+        })
+    finally:
+        state_backend.release_lock(f"backfill:{key}", process_owner())
+
+
+def start_backfill(symbol, interval, start, end):
+    """Start a backfill task on the running loop; False if one is already running"""
+    key = backfill_key(symbol, interval)
+    if key in _running or not state_backend.acquire_lock(f"backfill:{key}", process_owner()):
+        return False
+
+    backfill_status[key] = {
+        "symbol": symbol,
+        "interval": interval,
+        "start": start,
+        "end": end,
+        "status": "running",
+        "progress": 0.0,
+        "message": "Backfill started",
+        "started_at": datetime.now().isoformat(),
+        "completed_at": None
+    }
+    task = asyncio.create_task(run_backfill(symbol, interval, start, end))
+    _running[key] = task
+    task.add_done_callback(lambda _: _running.pop(key, None))
+    return True
+
+
+def resume_backfills():
+    """Restart backfills that were running when their worker died; finished months are skipped"""
+    resumed = []
+    for key, status in backfill_status.items():
+        # start_backfill refuses the ones still running in a live worker
+        if status.get("status") == "running" and start_backfill(
+            status["symbol"], status["interval"], status["start"], status["end"]
+        ):
+            logger.info(f"Resuming backfill of {key}")
+            resumed.append(key)
+    return resumed
@@ -0,0 +1,24 @@
+import hashlib
+
+from fastapi import Request, Response
+
+
+def make_etag(*parts):
+    """Weak ETag over `parts`; weak because GZipMiddleware may re-encode the body"""
+    digest = hashlib.sha1(repr(parts).encode()).hexdigest()[:20]
+    return f'W/"{digest}"'
+
+
+def not_modified(request: Request, response: Response, etag):
+    """Tag `response` with `etag`; returns a 304 if the client already has it, else None"""
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = "no-cache"
+
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is None:
+        return None
+    # Weak comparison, as RFC 9110 asks for If-None-Match
+    tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    if "*" in tags or etag.removeprefix("W/") in tags:
+        return Response(status_code=304, headers={"ETag": etag, "Cache-Control": "no-cache"})
+    return None
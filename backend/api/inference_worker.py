@@ -0,0 +1,134 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+import numpy as np
+
+from core.config import logger, INFERENCE_MAX_BATCH_SIZE, INFERENCE_MAX_WAIT_MS
+from model.predict import mc_dropout_forward
+
+
+class _Job:
+    __slots__ = ("model", "inputs", "stochastic", "future")
+
+    def __init__(self, model, inputs, stochastic):
+        self.model = model
+        self.inputs = inputs
+        self.stochastic = stochastic
+        self.future = Future()
+
+    def run(self, batch):
+        if self.stochastic:
+            return mc_dropout_forward(self.model, batch)
+        return self.model.predict_on_batch(batch)
+
+
+class InferenceWorker:
+    """Runs all model forward passes on one thread, batching concurrent requests.
+
+    Jobs for the same model, input shape and dropout mode that arrive within `max_wait_ms` of
+    each other are stacked into a single forward pass of up to `max_batch_size`
+    rows and the outputs are split back per job.
+    """
+
+    def __init__(self, max_batch_size=INFERENCE_MAX_BATCH_SIZE, max_wait_ms=INFERENCE_MAX_WAIT_MS):
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self.stats = {"batches": 0, "jobs": 0, "rows": 0}
+        self._queue = queue.Queue()
+        self._pending = None
+        self._thread = None
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        if not self.running:
+            self._thread = threading.Thread(target=self._run, daemon=True, name="inference-worker")
+            self._thread.start()
+
+    def stop(self):
+        if self.running:
+            self._queue.put(None)
+            self._thread.join()
+        self._thread = None
+
+    def submit(self, model, inputs, stochastic=False):
+        """Queue a forward pass of `inputs` (batch, time, features); returns a Future
+
+        `stochastic` keeps Dropout active (Monte Carlo dropout sampling).
+        """
+        job = _Job(model, np.asarray(inputs, dtype=np.float32), stochastic)
+        if not self.running:
+            # No worker thread (scripts, tests): run inline
+            job.future.set_result(job.run(job.inputs))
+        else:
+            self._queue.put(job)
+        return job.future
+
+    def predict(self, model, inputs, stochastic=False):
+        """Blocking forward pass; call from a worker thread, never the event loop"""
+        return self.submit(model, inputs, stochastic).result()
+
+    def _collect(self):
+        """Block for one job, then gather more until the batch is full or the wait expires"""
+        first = self._pending or self._queue.get()
+        self._pending = None
+        if first is None:
+            return None
+
+        jobs = [first]
+        rows = len(first.inputs)
+        deadline = time.monotonic() + self.max_wait
+        while rows < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                job = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if job is None:
+                self._queue.put(None)
+                break
+            if rows + len(job.inputs) > self.max_batch_size:
+                self._pending = job
+                break
+            jobs.append(job)
+            rows += len(job.inputs)
+        return jobs
+
+    def _run(self):
+        while True:
+            jobs = self._collect()
+            if jobs is None:
+                return
+
+            groups = {}
+            for job in jobs:
+                groups.setdefault((id(job.model), job.inputs.shape[1:], job.stochastic), []).append(job)
+
+            for group in groups.values():
+                try:
+                    batch = np.concatenate([job.inputs for job in group])
+                    outputs = np.asarray(group[0].run(batch))
+                except Exception as e:
+                    logger.error(f"Batched inference failed: {e}")
+                    for job in group:
+                        job.future.set_exception(e)
+                    continue
+
+                start = 0
+                for job in group:
+                    end = start + len(job.inputs)
+                    job.future.set_result(outputs[start:end])
+                    start = end
+
+                self.stats["batches"] += 1
+                self.stats["jobs"] += len(group)
+                self.stats["rows"] += len(batch)
+
+
+inference_worker = InferenceWorker()
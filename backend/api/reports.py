@@ -0,0 +1,76 @@
+import asyncio
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+from api.training_jobs import cpu_budget
+from core.config import logger, report_status
+from model.artifacts import bundle_dir, REPORT_DATA_FILE, REPORT_FILE
+from model.report import init_render_worker, render_bundle_report
+
+_executor = None
+# Render tasks in flight in this process, by report key
+_pending = {}
+
+
+def _get_executor():
+    """One spawned worker, so reports render one at a time off the event loop
+
+    It runs on the training cores and priority, so reports never compete
+    with serving. Only matplotlib and the artifacts layout are imported
+    there, not TensorFlow.
+    """
+    global _executor
+    if _executor is None:
+        budget = cpu_budget()
+        _executor = ProcessPoolExecutor(
+            max_workers=1,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=init_render_worker,
+            initargs=(budget["cpus"], budget["nice"])
+        )
+    return _executor
+
+
+def report_key(symbol, version):
+    return f"{symbol}@{version}"
+
+
+def report_path(symbol, version):
+    return bundle_dir(symbol, version) / REPORT_FILE
+
+
+def can_render(symbol, version):
+    return (bundle_dir(symbol, version) / REPORT_DATA_FILE).exists()
+
+
+async def render_report_job(symbol, version):
+    key = report_key(symbol, version)
+    report_status[key] = {"status": "rendering", "symbol": symbol, "version": version,
+                          "started_at": datetime.now().isoformat()}
+    try:
+        path = await asyncio.get_running_loop().run_in_executor(
+            _get_executor(), render_bundle_report, symbol, version
+        )
+        # The file is the record of success
+        del report_status[key]
+        logger.info(f"Training report for {symbol} {version} written to {path}")
+    except Exception as e:
+        logger.error(f"Training report for {symbol} {version} failed: {e}")
+        report_status.patch(key, {"status": "failed", "message": str(e),
+                                  "completed_at": datetime.now().isoformat()})
+
+
+def schedule_report(symbol, version):
+    """Queue the report of a published bundle unless it exists or is already queued"""
+    key = report_key(symbol, version)
+    if key in _pending or report_path(symbol, version).exists():
+        return
+    task = asyncio.create_task(render_report_job(symbol, version))
+    _pending[key] = task
+    task.add_done_callback(lambda _: _pending.pop(key, None))
+
+
+def shutdown_reports():
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,162 @@
+import asyncio
+from datetime import datetime, timedelta
+
+from api.accuracy import live_accuracy, staleness
+from api.training_jobs import lock_training, training_budget
+from core.config import (
+    logger, retrain_status, training_status, state_backend,
+    RETRAIN_SYMBOLS, RETRAIN_WINDOW_START, RETRAIN_WINDOW_MINUTES, RETRAIN_EPOCHS,
+    RETRAIN_JOB_OVERHEAD_SECONDS, RETRAIN_MIN_SECONDS
+)
+from core.state_backend import process_owner
+from model.artifacts import list_manifests, read_manifest
+from model.LSTM import ARCHITECTURES, DEFAULT_ARCHITECTURE
+
+_task = None
+
+
+def next_window(now, start, minutes):
+    """Opening time of the daily window at `start` ("HH:MM") that is open now, else of the next one
+
+    A window still open at `now`, including yesterday's one running past
+    midnight, counts, so a restart during the window does not skip the night.
+    """
+    hour, minute = (int(part) for part in start.split(":"))
+    today = now.replace(hour=hour, minute=minute, second=0, microsecond=0)
+    for opens in (today - timedelta(days=1), today):
+        if opens + timedelta(minutes=minutes) > now:
+            return opens
+    return today + timedelta(days=1)
+
+
+def retrain_order(symbols, window_opens):
+    """Published models of `symbols` not retrained since `window_opens`, stale ones
+    first, then the longest since trained"""
+    manifests = [
+        m for m in (read_manifest(s) for s in symbols)
+        # Done earlier in this window, before a restart
+        if m is not None and m.get("created_at", "") < window_opens.isoformat()
+    ]
+
+    def priority(manifest):
+        accuracy = live_accuracy(manifest["symbol"], manifest.get("interval", "5min"))
+        stale, _ = staleness(manifest, accuracy)
+        return (not stale, manifest.get("created_at", ""))
+    return sorted(manifests, key=priority)
+
+
+def job_budget(window_end, jobs_left, now=None):
+    """Training seconds for the next job: an equal share of what is left of the window
+
+    Recomputed before every job, so time a job leaves unused goes to the
+    ones after it and an overrun is taken from them.
+    """
+    left = (window_end - (now or datetime.now())).total_seconds()
+    return round(left / jobs_left - RETRAIN_JOB_OVERHEAD_SECONDS, 1)
+
+
+async def run_retrain_window(symbols, window_opens, window_end):
+    """Retrain every symbol, one at a time, so the whole run ends by `window_end`"""
+    from api.api_routes import train_model_background
+
+    manifests = retrain_order(symbols, window_opens)
+    jobs = {}
+    retrain_status["last_run"] = {
+        "started_at": datetime.now().isoformat(),
+        "window_end": window_end.isoformat(),
+        "symbols": [m["symbol"] for m in manifests],
+        "jobs": jobs,
+    }
+    for i, manifest in enumerate(manifests):
+        symbol = manifest["symbol"]
+        seconds = job_budget(window_end, len(manifests) - i)
+        if seconds < RETRAIN_MIN_SECONDS:
+            # Every later job would get even less; leave them for the next window
+            for skipped in manifests[i:]:
+                jobs[skipped["symbol"]] = {"status": "skipped", "reason": "window exhausted"}
+            logger.warning(f"Nightly retraining window exhausted; skipped {len(manifests) - i} symbols")
+            break
+        if not lock_training(symbol):
+            jobs[symbol] = {"status": "skipped", "reason": "already training"}
+            continue
+
+        budget = training_budget(max_seconds=seconds)
+        jobs[symbol] = {"status": "training", "budget": budget}
+        training_status[symbol] = {
+            "symbol": symbol,
+            "status": "training",
+            "progress": 0.0,
+            "message": "Nightly retraining started",
+            "source": "nightly",
+            "started_at": datetime.now().isoformat(),
+            "completed_at": None
+        }
+        # Same configuration the current model was trained with; legacy
+        # manifests describe the architecture instead of naming it
+        architecture = manifest.get("model_architecture")
+        await train_model_background(
+            symbol,
+            manifest.get("interval", "5min"),
+            manifest["input_shape"][0],
+            manifest.get("prediction_horizon", 1),
+            RETRAIN_EPOCHS,
+            architecture if architecture in ARCHITECTURES else DEFAULT_ARCHITECTURE,
+            budget=budget
+        )
+        status = training_status.get(symbol) or {}
+        jobs[symbol] = {
+            "status": status.get("status"),
+            "budget": status.get("budget", budget),
+            "completed_at": status.get("completed_at")
+        }
+    retrain_status["last_run"]["completed_at"] = datetime.now().isoformat()
+    retrain_status["last_run"]["overrun_seconds"] = round(max(0.0, (datetime.now() - window_end).total_seconds()), 1)
+
+
+async def run_retrain_scheduler(start, minutes):
+    """Open the retraining window every day at `start`, forever"""
+    retrain_status["running"] = True
+    last_window = None
+    try:
+        while True:
+            now = datetime.now()
+            opens = next_window(now, start, minutes)
+            if opens == last_window:
+                # Finished before the window closed; wait for tomorrow's
+                opens += timedelta(days=1)
+            retrain_status["next_window"] = opens.isoformat()
+            await asyncio.sleep(max(0.0, (opens - now).total_seconds()))
+            last_window = opens
+            # One worker retrains; the lock is shared through the state backend
+            if not state_backend.acquire_lock("retrain", process_owner()):
+                continue
+            try:
+                symbols = RETRAIN_SYMBOLS or [m["symbol"] for m in list_manifests() if m["version"] is not None]
+                await run_retrain_window(symbols, opens, opens + timedelta(minutes=minutes))
+            except Exception as e:
+                logger.error(f"Nightly retraining failed: {e}")
+            finally:
+                state_backend.release_lock("retrain", process_owner())
+    finally:
+        retrain_status["running"] = False
+
+
+def start_retrain_scheduler():
+    """Start the nightly retraining task on the running event loop (no-op without a window)"""
+    global _task
+    if RETRAIN_WINDOW_START and _task is None:
+        _task = asyncio.get_running_loop().create_task(
+            run_retrain_scheduler(RETRAIN_WINDOW_START, RETRAIN_WINDOW_MINUTES)
+        )
+        logger.info(f"Nightly retraining scheduled at {RETRAIN_WINDOW_START} for {RETRAIN_WINDOW_MINUTES:g} minutes")
+
+
+async def stop_retrain_scheduler():
+    global _task
+    if _task is not None:
+        _task.cancel()
+        try:
+            await _task
+        except asyncio.CancelledError:
+            pass
+        _task = None
@@ -12,12 +12,32 @@ class TrainingRequest(BaseModel):
     interval: str = Field(default="5min", description="Time interval")
     sequence_length: int = Field(default=60, description="Number of time steps to look back")
     prediction_horizon: int = Field(default=1, description="Steps ahead to predict")
-    epochs: int = Field(default=50, description="Number of training epochs")
+    epochs: int = Field(default=50, description="Maximum number of training epochs")
+    architecture: str = Field(
+        default="stacked_lstm",
+        description="Model architecture: stacked_lstm, stacked_lstm_narrow, gru, gru_narrow, conv1d, conv1d_narrow"
+    )
+    max_seconds: Optional[float] = Field(
+        default=None, gt=0, description="Training time budget; stops with the best weights so far"
+    )
+    max_samples_per_epoch: Optional[int] = Field(
+        default=None, ge=32, description="Random training windows drawn per epoch (default: all)"
+    )
+
+class BackfillRequest(BaseModel):
+    symbol: str = Field(..., description="Stock symbol to backfill")
+    interval: str = Field(default="5min", description="Time interval")
+    start: str = Field(..., pattern=r"^\d{4}-\d{2}$", description="First month, YYYY-MM")
+    end: str = Field(..., pattern=r"^\d{4}-\d{2}$", description="Last month, YYYY-MM (inclusive)")
 
 class PredictionRequest(BaseModel):
     symbol: str = Field(..., description="Stock symbol")
     steps: int = Field(default=10, description="Number of future steps to predict")
     use_latest_data: bool = Field(default=True, description="Fetch latest data for prediction")
+    confidence_samples: Optional[int] = Field(
+        default=None, ge=2, le=1000,
+        description="Monte Carlo dropout samples for per-step mean/p5/p95 bands"
+    )
 
 class StockData(BaseModel):
     timestamp: str
@@ -32,10 +52,13 @@ class PredictionResponse(BaseModel):
     predictions: List[Dict[str, Any]]
     model_metrics: Optional[Dict[str, float]]
     generated_at: str
+    cached: bool = False
+    mode: Optional[str] = None
+    freshness: Optional[Dict[str, Any]] = None
 
 class TrainingStatus(BaseModel):
     symbol: str
-    status: str  # "training", "completed", "failed"
+    status: str  # "training", "completed", "failed", "stale"
     progress: Optional[float]
     message: str
     started_at: str
@@ -0,0 +1,210 @@
+import queue
+import shutil
+import asyncio
+import multiprocessing
+from datetime import datetime
+from pathlib import Path
+
+from core.config import (
+    logger, training_status, training_jobs, state_backend,
+    TRAINING_CPU_AFFINITY, TRAINING_NICE, TRAINING_INTRA_OP_THREADS, TRAINING_INTER_OP_THREADS,
+    MEMORY_CEILING_MB, MEMORY_TRACEMALLOC_TOP, TRAINING_MAX_SECONDS, TRAINING_MAX_SAMPLES_PER_EPOCH
+)
+from core.metrics import export_stages
+from core.state_backend import process_owner
+from core.state_manager import STATE_DIR
+from model.dataset_cache import dataset_dir
+from model.training_process import run_training
+
+# Layout of a running job:
+#   state/training_jobs/{symbol}/last.keras          -> model and optimizer after the last epoch
+#   state/training_jobs/{symbol}/best_weights.npz    -> weights early stopping will restore
+TRAINING_JOB_DIR = Path(STATE_DIR) / "training_jobs"
+CHECKPOINT_FILE = "last.keras"
+BEST_WEIGHTS_FILE = "best_weights.npz"
+
+# Symbols training in this process. The shared lock is re-entrant for its
+# owner, and every request of a worker has the same owner, so it only keeps
+# other workers out.
+_training = set()
+
+
+def job_dir(symbol):
+    return TRAINING_JOB_DIR / symbol
+
+
+def lock_training(symbol):
+    """Take the training lock of a symbol; False if a job in any worker, this one included, holds it"""
+    if symbol in _training or not state_backend.acquire_lock(f"train:{symbol}", process_owner()):
+        return False
+    _training.add(symbol)
+    return True
+
+
+def unlock_training(symbol):
+    _training.discard(symbol)
+    state_backend.release_lock(f"train:{symbol}", process_owner())
+
+
+def start_job(symbol, interval, sequence_length, prediction_horizon, epochs, architecture, dataset,
+              budget=None, profile_run=False, resume=None):
+    """Record a training job; the returned dict is everything the training process needs"""
+    job_dir(symbol).mkdir(parents=True, exist_ok=True)
+    job = resume or {
+        "symbol": symbol,
+        "interval": interval,
+        "sequence_length": sequence_length,
+        "prediction_horizon": prediction_horizon,
+        "epochs": epochs,
+        "architecture": architecture,
+        "budget": budget or {},
+        "profile_run": profile_run,
+        "dataset": {"key": dataset["key"], "data_version": dataset["data_version"]},
+        "epoch": 0,
+        "callbacks": {},
+        "started_at": datetime.now().isoformat(),
+    }
+    job = {
+        **job,
+        "checkpoint_path": str(job_dir(symbol) / CHECKPOINT_FILE),
+        "best_weights_path": str(job_dir(symbol) / BEST_WEIGHTS_FILE),
+        "owner": process_owner(),
+        "updated_at": datetime.now().isoformat()
+    }
+    training_jobs[symbol] = job
+    return job
+
+
+def record_checkpoint(job, epochs_done, callback_state):
+    training_jobs.patch(job["symbol"], {
+        "epoch": epochs_done,
+        "callbacks": callback_state,
+        "updated_at": datetime.now().isoformat()
+    })
+    training_status.patch(job["symbol"], {
+        "message": f"Training model... epoch {epochs_done}/{job['epochs']}",
+        "progress": round(60.0 + 30.0 * epochs_done / job["epochs"], 1),
+        "epoch": epochs_done
+    })
+
+
+def training_budget(max_seconds=None, max_samples_per_epoch=None):
+    """Limits of a job: the tighter of the requested ones and the server-wide ones (0 = none)"""
+    def tighter(requested, server):
+        limits = [v for v in (requested, server) if v]
+        return min(limits) if limits else None
+    return {
+        "max_seconds": tighter(max_seconds, TRAINING_MAX_SECONDS),
+        "max_samples_per_epoch": tighter(max_samples_per_epoch, TRAINING_MAX_SAMPLES_PER_EPOCH),
+    }
+
+
+def cpu_budget():
+    return {
+        "cpus": TRAINING_CPU_AFFINITY,
+        "nice": TRAINING_NICE,
+        "intra_op_threads": TRAINING_INTRA_OP_THREADS,
+        "inter_op_threads": TRAINING_INTER_OP_THREADS,
+    }
+
+
+def memory_limits():
+    return {"ceiling_mb": MEMORY_CEILING_MB, "tracemalloc_top": MEMORY_TRACEMALLOC_TOP}
+
+
+def record_memory(symbol, stages):
+    """Merge per-stage memory accounting into the training status and the metrics"""
+    status = training_status.get(symbol) or {}
+    training_status.patch(symbol, {"memory": {**status.get("memory", {}), **stages}})
+    export_stages("train", stages)
+
+
+async def run_training_process(job):
+    """Run the job in a separate process and relay its progress; returns its result
+
+    The API process keeps its own TensorFlow thread pools and cores for
+    serving, and its event loop stays free while the model trains.
+    """
+    context = multiprocessing.get_context("spawn")
+    events = context.Queue()
+    process = context.Process(
+        target=run_training, args=(job, events, cpu_budget(), memory_limits()),
+        name=f"train-{job['symbol']}", daemon=True
+    )
+    process.start()
+    try:
+        while True:
+            try:
+                kind, payload = await asyncio.to_thread(events.get, True, 1.0)
+            except queue.Empty:
+                if not process.is_alive() and events.empty():
+                    raise RuntimeError(f"Training process exited with code {process.exitcode}")
+                continue
+
+            if kind == "checkpoint":
+                record_checkpoint(job, payload["epoch"], payload["callbacks"])
+            elif kind == "status":
+                training_status.patch(job["symbol"], payload)
+            elif kind == "memory":
+                record_memory(job["symbol"], payload)
+            elif kind == "done":
+                return payload
+            elif kind == "error":
+                raise RuntimeError(payload)
+    finally:
+        await asyncio.to_thread(process.join, 5)
+        if process.is_alive():
+            process.terminate()
+
+
+def finish_job(symbol):
+    """Forget a job that completed or failed; only interrupted jobs are resumed"""
+    del training_jobs[symbol]
+    shutil.rmtree(job_dir(symbol), ignore_errors=True)
+
+
+def resumable(job):
+    """A job can continue if it got through an epoch and its dataset is still cached"""
+    return (
+        job.get("epoch", 0) > 0
+        and (job_dir(job["symbol"]) / CHECKPOINT_FILE).exists()
+        and dataset_dir(job["symbol"], job["interval"], job["dataset"]["key"]).exists()
+    )
+
+
+def claim_interrupted_jobs():
+    """Take over training runs whose worker died; returns the jobs to resume
+
+    A run is interrupted when its status still says "training" but no live
+    process holds its lock. Runs that can continue are locked by this
+    process and returned; the others are marked stale so /api/train accepts
+    the symbol again.
+    """
+    to_resume = []
+    for symbol, status in training_status.items():
+        if status.get("status") != "training":
+            continue
+        if not lock_training(symbol):
+            # Still running in another live worker
+            continue
+
+        job = training_jobs.get(symbol)
+        if job is not None and resumable(job):
+            logger.info(f"Resuming training for {symbol} from epoch {job['epoch']}")
+            training_status.patch(symbol, {
+                "message": f"Resuming from epoch {job['epoch']}/{job['epochs']}",
+                "resumed_at": datetime.now().isoformat()
+            })
+            to_resume.append(job)
+            continue
+
+        logger.warning(f"Training for {symbol} was interrupted and cannot be resumed")
+        training_status.patch(symbol, {
+            "status": "stale",
+            "message": "Training was interrupted by a restart; no checkpoint or cached dataset to resume from",
+            "completed_at": datetime.now().isoformat()
+        })
+        if job is not None:
+            finish_job(symbol)
+        unlock_training(symbol)
+    return to_resume
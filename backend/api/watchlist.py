@@ -0,0 +1,78 @@
+import asyncio
+from datetime import datetime, timedelta
+
+from api.api_logic import get_forecast, next_bar_close, upstream_limiter, INTERVAL_MINUTES
+from core.config import (
+    logger, watchlist_status, state_backend,
+    WATCHLIST, WATCHLIST_INTERVAL, WATCHLIST_STEPS, WATCHLIST_CLOSE_DELAY
+)
+from core.state_backend import process_owner
+
+_task = None
+
+
+async def refresh_watchlist(symbols, interval, steps):
+    """Recompute the forecast of every watchlist symbol for the bar that just closed"""
+    # Forecasts stay valid until this round has come back around to them
+    round_length = WATCHLIST_CLOSE_DELAY + len(symbols) * upstream_limiter.spacing
+    valid_until = next_bar_close(datetime.now(), interval) + timedelta(seconds=round_length)
+
+    for symbol in symbols:
+        await upstream_limiter.acquire()
+        try:
+            forecast = await get_forecast(
+                symbol, steps, interval=interval, refresh=True,
+                source="watchlist", valid_until=valid_until
+            )
+            watchlist_status["refreshed"][symbol] = forecast["generated_at"]
+            watchlist_status["errors"].pop(symbol, None)
+        except Exception as e:
+            detail = getattr(e, "detail", str(e))
+            watchlist_status["errors"][symbol] = detail
+            logger.error(f"Watchlist refresh failed for {symbol}: {detail}")
+    watchlist_status["last_run"] = datetime.now().isoformat()
+
+
+async def run_watchlist(symbols, interval, steps):
+    """Refresh the watchlist shortly after each bar close, forever"""
+    if len(symbols) * upstream_limiter.spacing > INTERVAL_MINUTES[interval] * 60:
+        logger.warning(
+            f"Watchlist of {len(symbols)} symbols cannot be refreshed within one {interval} bar "
+            f"at {60 / upstream_limiter.spacing:g} upstream calls per minute"
+        )
+
+    watchlist_status["running"] = True
+    try:
+        while True:
+            now = datetime.now()
+            wake_at = next_bar_close(now, interval) + timedelta(seconds=WATCHLIST_CLOSE_DELAY)
+            await asyncio.sleep((wake_at - now).total_seconds())
+            # With several workers only the lock holder refreshes; the others
+            # read its forecasts from the shared state backend.
+            watchlist_status["leader"] = state_backend.acquire_lock("watchlist", process_owner())
+            if watchlist_status["leader"]:
+                await refresh_watchlist(symbols, interval, steps)
+    finally:
+        watchlist_status["running"] = False
+        state_backend.release_lock("watchlist", process_owner())
+
+
+def start_watchlist():
+    """Start the scheduler task on the running event loop (no-op without a watchlist)"""
+    global _task
+    if WATCHLIST and _task is None:
+        _task = asyncio.get_running_loop().create_task(
+            run_watchlist(WATCHLIST, WATCHLIST_INTERVAL, WATCHLIST_STEPS)
+        )
+        logger.info(f"Watchlist scheduler started for {WATCHLIST} every {WATCHLIST_INTERVAL}")
+
+
+async def stop_watchlist():
+    global _task
+    if _task is not None:
+        _task.cancel()
+        try:
+            await _task
+        except asyncio.CancelledError:
+            pass
+        _task = None
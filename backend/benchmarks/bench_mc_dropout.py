@@ -0,0 +1,67 @@
+"""Latency of Monte Carlo dropout forecasts as the sample count grows.
+
+Compares one batched forward pass per step (what /api/predict does) with
+one call per sample. Run from the backend directory:
+
+    python -m benchmarks.bench_mc_dropout --samples 1 10 50 100 200
+"""
+import argparse
+import time
+
+import numpy as np
+from sklearn.preprocessing import MinMaxScaler
+
+from model.LSTM import build_lstm_model
+from model.predict import mc_dropout_forward, sample_future_prices
+
+
+def median_ms(fn, repeats):
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return float(np.median(timings)) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--samples", type=int, nargs="+", default=[1, 10, 25, 50, 100, 200])
+    parser.add_argument("--steps", type=int, default=10)
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--sequence-length", type=int, default=60)
+    parser.add_argument("--features", type=int, default=16)
+    parser.add_argument("--skip-looped-above", type=int, default=50)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    model = build_lstm_model((args.sequence_length, args.features))
+    scaler = MinMaxScaler().fit(rng.random((500, args.features)) * 100)
+    feature_columns = [f"f{i}" for i in range(args.features)]
+    feature_columns[3] = "close"
+    last_sequence = rng.random((args.sequence_length, args.features))
+
+    def batched(samples):
+        sample_future_prices(model, scaler, last_sequence, feature_columns, steps=args.steps, samples=samples)
+
+    def looped(samples):
+        for _ in range(samples):
+            sample_future_prices(model, scaler, last_sequence, feature_columns, steps=args.steps, samples=1)
+
+    # Trace the stochastic forward pass for every batch size up front
+    for samples in args.samples:
+        mc_dropout_forward(model, np.repeat(last_sequence[np.newaxis], samples, axis=0))
+
+    print(f"{args.steps}-step forecast, median of {args.repeats} runs")
+    print(f"{'samples':>8} {'batched ms':>12} {'looped ms':>12}")
+    for samples in args.samples:
+        batched_ms = median_ms(lambda: batched(samples), args.repeats)
+        if samples <= args.skip_looped_above:
+            looped_ms = f"{median_ms(lambda: looped(samples), args.repeats):12.1f}"
+        else:
+            looped_ms = f"{'-':>12}"
+        print(f"{samples:>8} {batched_ms:12.1f} {looped_ms}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""/api/predict latency with and without a concurrent training run.
+
+Against a running API (see load_test_api.py for the offline setup), drives
+/api/predict from concurrent clients for --duration seconds on its own, then
+starts /api/train for another symbol and measures again until the run
+finishes. Prints p50/p95/p99/max for both phases. The predicted symbol
+needs a trained model already. Run from the backend directory:
+
+    python -m benchmarks.bench_training_isolation --symbol AAPL --train-symbol MSFT --train-epochs 5
+
+Compare runs with different SERVING_*/TRAINING_* CPU settings on the server.
+"""
+import argparse
+import asyncio
+import time
+
+import httpx
+import numpy as np
+
+
+async def predict_load(client, args, stop):
+    latencies, errors, cached = [], 0, 0
+
+    async def one_client():
+        nonlocal errors, cached
+        while not stop():
+            start = time.perf_counter()
+            response = await client.post("/api/predict", json={"symbol": args.symbol, "steps": args.steps})
+            latencies.append(time.perf_counter() - start)
+            if response.status_code != 200:
+                errors += 1
+            elif response.json().get("cached"):
+                cached += 1
+
+    await asyncio.gather(*(one_client() for _ in range(args.clients)))
+    return np.array(latencies) * 1000, errors, cached
+
+
+async def wait_for_training(client, symbol, timeout):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        status = (await client.get(f"/api/training-status/{symbol}")).json()
+        if status.get("status") != "training":
+            return status
+        await asyncio.sleep(1)
+    return None
+
+
+def report(name, latencies, errors, cached, elapsed):
+    p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+    print(f"{name:<16}{len(latencies):>7}{len(latencies) / elapsed:>8.1f}"
+          f"{p50:>9.1f}{p95:>9.1f}{p99:>9.1f}{latencies.max():>9.1f}{errors:>8}{cached:>8}")
+
+
+async def run(args):
+    async with httpx.AsyncClient(base_url=args.base_url, timeout=args.timeout) as client:
+        # Warm up: model loaded and first forecast computed
+        await client.post("/api/predict", json={"symbol": args.symbol, "steps": args.steps})
+
+        print(f"{'phase':<16}{'count':>7}{'req/s':>8}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'max ms':>9}{'errors':>8}{'cached':>8}")
+        start = time.perf_counter()
+        deadline = start + args.duration
+        baseline = await predict_load(client, args, lambda: time.perf_counter() >= deadline)
+        report("idle", *baseline, time.perf_counter() - start)
+
+        response = await client.post("/api/train", json={
+            "symbol": args.train_symbol, "epochs": args.train_epochs, "architecture": args.architecture
+        })
+        response.raise_for_status()
+
+        done = asyncio.Event()
+        start = time.perf_counter()
+        load = asyncio.create_task(predict_load(client, args, done.is_set))
+        status = await wait_for_training(client, args.train_symbol, args.train_timeout)
+        done.set()
+        during = await load
+        elapsed = time.perf_counter() - start
+        report("during training", *during, elapsed)
+        print(f"training: {status.get('status') if status else 'timed out'} after {elapsed:.1f}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--symbol", default="AAPL", help="Symbol predicted throughout (needs a model)")
+    parser.add_argument("--train-symbol", default="MSFT", help="Symbol trained during the second phase")
+    parser.add_argument("--train-epochs", type=int, default=5)
+    parser.add_argument("--architecture", default="stacked_lstm")
+    parser.add_argument("--clients", type=int, default=4)
+    parser.add_argument("--steps", type=int, default=10)
+    parser.add_argument("--duration", type=float, default=15.0, help="Seconds of the idle phase")
+    parser.add_argument("--train-timeout", type=float, default=600.0)
+    parser.add_argument("--timeout", type=float, default=120.0)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
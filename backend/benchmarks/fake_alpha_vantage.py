@@ -0,0 +1,179 @@
+"""Local stand-in for Alpha Vantage's TIME_SERIES_INTRADAY endpoint.
+
+Serves synthetic random-walk bars (seeded by symbol, so repeated calls agree)
+or recorded payloads, with configurable latency and a per-minute call limit
+that answers with the same "Note" payload the real API sends. Point the API
+at it and load-test without spending quota. Run from the backend directory:
+
+    python -m benchmarks.fake_alpha_vantage --port 8001 --latency-ms 300
+    ALPHA_VANTAGE_URL=http://127.0.0.1:8001/query uvicorn main:app
+
+Recorded payloads are raw API responses saved as {SYMBOL}_{interval}.json in
+the --recordings directory; symbols without a recording get synthetic bars.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import time
+import zlib
+from collections import deque
+from datetime import datetime, timedelta
+
+import numpy as np
+from fastapi import FastAPI
+
+VALID_INTERVALS = {"1min": 1, "5min": 5, "15min": 15, "30min": 30, "60min": 60}
+COMPACT_BARS = 100
+FULL_DAYS = 30
+
+settings = {
+    "latency_ms": 0.0,
+    "jitter_ms": 0.0,
+    "calls_per_minute": 0,
+    "recordings": None,
+}
+stats = {"calls": 0, "served": 0, "rate_limited": 0}
+_recent_calls = deque()
+
+app = FastAPI(title="Fake Alpha Vantage")
+
+
+def session_bars(end, days, step):
+    """Bar-open times every `step` minutes of regular sessions (09:30-16:00, weekdays)"""
+    bars = []
+    day = (end - timedelta(days=days)).date()
+    while day <= end.date():
+        if day.weekday() < 5:
+            session = datetime.combine(day, datetime.min.time()) + timedelta(hours=9, minutes=30)
+            bars.extend(session + timedelta(minutes=m) for m in range(0, 390, step))
+        day += timedelta(days=1)
+    return [t for t in bars if t <= end]
+
+
+def synthetic_series(symbol, interval, outputsize="compact", month=None):
+    """Deterministic OHLCV bars for `symbol` in Alpha Vantage's JSON layout"""
+    step = VALID_INTERVALS[interval]
+    if month:
+        first = datetime.strptime(month, "%Y-%m")
+        end = (first + timedelta(days=32)).replace(day=1) - timedelta(minutes=1)
+        days = (end - first).days + 1
+    else:
+        end = datetime.now().replace(second=0, microsecond=0)
+        days = FULL_DAYS
+
+    minutes = session_bars(end, days, step)
+    if month:
+        minutes = [t for t in minutes if t >= first]
+    if outputsize != "full" and not month:
+        minutes = minutes[-COMPACT_BARS:]
+
+    # Seeded by symbol so repeated calls return the same series
+    rng = np.random.default_rng(zlib.crc32(symbol.encode()))
+    base = 50 + rng.random() * 250
+    n = len(minutes)
+    returns = rng.normal(0, 0.002, n)
+    close = base * np.exp(np.cumsum(returns))
+    open_ = np.concatenate([[base], close[:-1]])
+    spread = np.abs(rng.normal(0, 0.001, n)) * close
+    high = np.maximum(open_, close) + spread
+    low = np.minimum(open_, close) - spread
+    volume = rng.integers(1_000, 100_000, n)
+
+    series = {}
+    for i in range(n - 1, -1, -1):
+        series[minutes[i].strftime("%Y-%m-%d %H:%M:%S")] = {
+            "1. open": f"{open_[i]:.4f}",
+            "2. high": f"{high[i]:.4f}",
+            "3. low": f"{low[i]:.4f}",
+            "4. close": f"{close[i]:.4f}",
+            "5. volume": str(int(volume[i])),
+        }
+    return {
+        "Meta Data": {
+            "1. Information": f"Intraday ({interval}) open, high, low, close prices and volume",
+            "2. Symbol": symbol,
+            "3. Last Refreshed": next(iter(series), ""),
+            "4. Interval": interval,
+            "5. Output Size": "Full size" if outputsize == "full" else "Compact",
+            "6. Time Zone": "US/Eastern",
+        },
+        f"Time Series ({interval})": series,
+    }
+
+
+def recorded_series(symbol, interval):
+    directory = settings["recordings"]
+    if not directory:
+        return None
+    path = os.path.join(directory, f"{symbol}_{interval}.json")
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+
+def rate_limited():
+    """Sliding one-minute window, like the free tier's per-minute quota"""
+    limit = settings["calls_per_minute"]
+    if not limit:
+        return False
+    now = time.monotonic()
+    while _recent_calls and now - _recent_calls[0] > 60:
+        _recent_calls.popleft()
+    if len(_recent_calls) >= limit:
+        return True
+    _recent_calls.append(now)
+    return False
+
+
+@app.get("/query")
+async def query(function: str, symbol: str, interval: str = "5min", outputsize: str = "compact",
+                month: str = None, apikey: str = None, datatype: str = "json"):
+    stats["calls"] += 1
+    delay = settings["latency_ms"] + random.uniform(0, settings["jitter_ms"])
+    if delay:
+        await asyncio.sleep(delay / 1000)
+
+    if rate_limited():
+        stats["rate_limited"] += 1
+        return {"Note": "Thank you for using Alpha Vantage! Our standard API call frequency is "
+                        f"{settings['calls_per_minute']} calls per minute."}
+    if function != "TIME_SERIES_INTRADAY":
+        return {"Error Message": f"Invalid API call. Function {function} is not supported by the fake server."}
+    if interval not in VALID_INTERVALS:
+        return {"Error Message": "Invalid API call. Please retry or visit the documentation for TIME_SERIES_INTRADAY."}
+
+    stats["served"] += 1
+    return recorded_series(symbol, interval) or synthetic_series(symbol, interval, outputsize, month)
+
+
+@app.get("/stats")
+async def get_stats():
+    return stats
+
+
+def main():
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8001)
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Fixed delay per call")
+    parser.add_argument("--jitter-ms", type=float, default=0.0, help="Extra uniform random delay per call")
+    parser.add_argument("--calls-per-minute", type=int, default=0, help="Answer with a rate-limit Note above this (0 = unlimited)")
+    parser.add_argument("--recordings", default=None, help="Directory of recorded {SYMBOL}_{interval}.json payloads")
+    args = parser.parse_args()
+
+    settings.update(
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        calls_per_minute=args.calls_per_minute,
+        recordings=args.recordings,
+    )
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+"""Async load generator for a running API.
+
+Drives /api/predict, /api/stock-data and /api/train with a weighted mix of
+requests from concurrent clients and reports throughput plus p50/p95/p99
+latency and status codes per endpoint. Pair it with the fake upstream so no
+API quota is spent:
+
+    python -m benchmarks.fake_alpha_vantage --port 8001 --latency-ms 200 &
+    ALPHA_VANTAGE_URL=http://127.0.0.1:8001/query uvicorn main:app --port 8000 &
+    python -m benchmarks.load_test_api --clients 50 --duration 60 --mix predict=8,stock-data=2
+
+Train requests use --train-epochs (default 1) so the mix stays realistic
+without the server spending minutes per job; a 409 means training is
+already running for that symbol.
+"""
+import argparse
+import asyncio
+import random
+import time
+from collections import Counter, defaultdict
+
+import httpx
+import numpy as np
+
+DEFAULT_MIX = "predict=8,stock-data=2"
+
+
+def parse_mix(text):
+    mix = {}
+    for part in text.split(","):
+        name, _, weight = part.partition("=")
+        if name not in ENDPOINTS:
+            raise SystemExit(f"Unknown endpoint '{name}'. Use {list(ENDPOINTS)}")
+        mix[name] = float(weight or 1)
+    return mix
+
+
+def predict_request(client, symbol, args):
+    body = {"symbol": symbol, "steps": args.steps}
+    if args.confidence_samples:
+        body["confidence_samples"] = args.confidence_samples
+    return client.post("/api/predict", json=body)
+
+
+def stock_data_request(client, symbol, args):
+    return client.get(f"/api/stock-data/{symbol}", params={"interval": args.interval, "limit": 100})
+
+
+def train_request(client, symbol, args):
+    return client.post("/api/train", json={
+        "symbol": symbol, "interval": args.interval, "epochs": args.train_epochs
+    })
+
+
+ENDPOINTS = {
+    "predict": predict_request,
+    "stock-data": stock_data_request,
+    "train": train_request,
+}
+
+
+async def run_load(args):
+    mix = parse_mix(args.mix)
+    names, weights = list(mix), list(mix.values())
+    latencies = defaultdict(list)
+    statuses = defaultdict(Counter)
+    deadline = time.monotonic() + args.duration if args.duration else None
+    remaining = [args.requests]
+
+    def more():
+        if deadline is not None:
+            return time.monotonic() < deadline
+        remaining[0] -= 1
+        return remaining[0] >= 0
+
+    async def client_loop(client):
+        while more():
+            name = random.choices(names, weights)[0]
+            symbol = random.choice(args.symbols)
+            start = time.perf_counter()
+            try:
+                response = await ENDPOINTS[name](client, symbol, args)
+                status = response.status_code
+            except httpx.HTTPError as e:
+                status = type(e).__name__
+            latencies[name].append(time.perf_counter() - start)
+            statuses[name][status] += 1
+
+    limits = httpx.Limits(max_connections=args.clients)
+    timeout = httpx.Timeout(args.timeout)
+    async with httpx.AsyncClient(base_url=args.base_url, limits=limits, timeout=timeout) as client:
+        start = time.perf_counter()
+        await asyncio.gather(*(client_loop(client) for _ in range(args.clients)))
+        elapsed = time.perf_counter() - start
+    return latencies, statuses, elapsed
+
+
+def report(latencies, statuses, elapsed):
+    total = sum(len(v) for v in latencies.values())
+    print(f"{total} requests in {elapsed:.1f}s: {total / elapsed:.1f} req/s")
+    print(f"{'endpoint':<12}{'count':>7}{'req/s':>8}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}  statuses")
+    for name in sorted(latencies):
+        values = np.array(latencies[name]) * 1000
+        p50, p95, p99 = np.percentile(values, [50, 95, 99])
+        codes = ", ".join(f"{code}: {n}" for code, n in sorted(statuses[name].items(), key=str))
+        print(f"{name:<12}{len(values):>7}{len(values) / elapsed:>8.1f}{p50:>9.1f}{p95:>9.1f}{p99:>9.1f}  {codes}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--clients", type=int, default=20, help="Concurrent clients")
+    parser.add_argument("--duration", type=float, default=None, help="Seconds to run (overrides --requests)")
+    parser.add_argument("--requests", type=int, default=500, help="Total requests when no --duration is given")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="Weighted endpoints, e.g. predict=8,stock-data=2,train=0.1")
+    parser.add_argument("--symbols", nargs="+", default=["AAPL"])
+    parser.add_argument("--interval", default="5min")
+    parser.add_argument("--steps", type=int, default=10)
+    parser.add_argument("--confidence-samples", type=int, default=None)
+    parser.add_argument("--train-epochs", type=int, default=1)
+    parser.add_argument("--timeout", type=float, default=120.0)
+    args = parser.parse_args()
+
+    report(*asyncio.run(run_load(args)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""Load test of the micro-batching inference worker.
+
+Simulates N concurrent /api/predict clients against an in-process model and
+compares the old inline path (model.predict inside the async handler) with
+the inference worker. The inline handlers block the event loop, so their
+latencies leave out the time other clients spend waiting; compare req/s.
+Run from the backend directory:
+
+    python -m benchmarks.load_test_inference --clients 50 --requests 200
+"""
+import argparse
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from sklearn.preprocessing import MinMaxScaler
+
+from api.inference_worker import InferenceWorker
+from model.LSTM import build_lstm_model
+from model.predict import predict_future_prices
+
+
+def percentile(values, q):
+    return float(np.percentile(values, q)) * 1000
+
+
+async def run_clients(handler, clients, total_requests):
+    latencies = []
+    remaining = [total_requests]
+
+    async def client():
+        while remaining[0] > 0:
+            remaining[0] -= 1
+            start = time.perf_counter()
+            await handler()
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(clients)))
+    return time.perf_counter() - start, latencies
+
+
+def report(name, elapsed, latencies):
+    print(
+        f"{name:<28} {len(latencies) / elapsed:8.1f} req/s   "
+        f"p50 {percentile(latencies, 50):8.1f} ms   p95 {percentile(latencies, 95):8.1f} ms   "
+        f"p99 {percentile(latencies, 99):8.1f} ms"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--clients", type=int, default=50)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--steps", type=int, default=10)
+    parser.add_argument("--sequence-length", type=int, default=60)
+    parser.add_argument("--features", type=int, default=16)
+    parser.add_argument("--max-batch-size", type=int, default=32)
+    parser.add_argument("--max-wait-ms", type=float, default=5)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    model = build_lstm_model((args.sequence_length, args.features))
+    scaler = MinMaxScaler().fit(rng.random((500, args.features)) * 100)
+    feature_columns = [f"f{i}" for i in range(args.features)]
+    feature_columns[3] = "close"
+    raw_window = rng.random((args.sequence_length, args.features)) * 100
+
+    def forecast(predict_fn=None):
+        last_sequence = scaler.transform(raw_window)
+        return predict_future_prices(
+            model, scaler, last_sequence, feature_columns, steps=args.steps, predict_fn=predict_fn
+        )
+
+    worker = InferenceWorker(max_batch_size=args.max_batch_size, max_wait_ms=args.max_wait_ms)
+    executor = ThreadPoolExecutor(max_workers=args.clients)
+
+    async def inline_handler():
+        forecast()
+
+    async def inline_batch_handler():
+        forecast(predict_fn=model.predict_on_batch)
+
+    async def worker_handler():
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(executor, forecast, lambda batch: worker.predict(model, batch))
+
+    # Trace both predict paths before timing anything
+    forecast()
+    forecast(predict_fn=model.predict_on_batch)
+
+    print(f"{args.clients} clients, {args.requests} forecasts of {args.steps} steps each")
+    report("inline model.predict", *asyncio.run(run_clients(inline_handler, args.clients, args.requests)))
+    report("inline predict_on_batch", *asyncio.run(run_clients(inline_batch_handler, args.clients, args.requests)))
+
+    worker.start()
+    report("inference worker", *asyncio.run(run_clients(worker_handler, args.clients, args.requests)))
+    worker.stop()
+    executor.shutdown()
+    print(f"worker: {worker.stats['batches']} batches, {worker.stats['rows'] / max(worker.stats['batches'], 1):.1f} rows/batch")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,13 @@
 
+import os
 import logging
+from dotenv import load_dotenv
 from fastapi import FastAPI
 from core.state_manager import load_json,load_pickle
+from core.state_backend import create_state_backend, StatusStore
+from core.cpu import available_cpus, parse_cpu_list, configure_tf_threads
+
+load_dotenv()
 
 # Initialize shared objects 
 app = FastAPI( 
@@ -10,7 +16,102 @@ app = FastAPI(
     version="1.0.0")
 logger = logging.getLogger(__name__)
 
-training_status = load_json("training_status.json")
+# CPU budgets. TensorFlow's thread pools are per process, so training runs in
+# a process of its own with its own pools, pinned by default to the cores not
+# kept for serving and at a lower scheduling priority.
+CPUS = available_cpus()
+SERVING_CPUS = int(os.getenv("SERVING_CPUS", str(max(1, len(CPUS) // 2))))
+SERVING_INTRA_OP_THREADS = int(os.getenv("SERVING_INTRA_OP_THREADS", str(SERVING_CPUS)))
+SERVING_INTER_OP_THREADS = int(os.getenv("SERVING_INTER_OP_THREADS", "2"))
+TRAINING_INTRA_OP_THREADS = int(os.getenv("TRAINING_INTRA_OP_THREADS", str(max(1, len(CPUS) - SERVING_CPUS))))
+TRAINING_INTER_OP_THREADS = int(os.getenv("TRAINING_INTER_OP_THREADS", "1"))
+TRAINING_CPU_AFFINITY = parse_cpu_list(os.getenv("TRAINING_CPU_AFFINITY", "")) or CPUS[SERVING_CPUS:] or None
+TRAINING_NICE = int(os.getenv("TRAINING_NICE", "10"))
+
+# Server-wide caps on every training job (0 = none); requests can only tighten them
+TRAINING_MAX_SECONDS = float(os.getenv("TRAINING_MAX_SECONDS", "0"))
+TRAINING_MAX_SAMPLES_PER_EPOCH = int(os.getenv("TRAINING_MAX_SAMPLES_PER_EPOCH", "0"))
+try:
+    # Before anything below can unpickle a model and start the TF runtime
+    configure_tf_threads(SERVING_INTRA_OP_THREADS, SERVING_INTER_OP_THREADS)
+except RuntimeError as e:
+    logger.warning(f"Serving thread pools already initialized: {e}")
+
+# Shared between uvicorn workers; "sqlite" (default), "memory" or "module:Class"
+STATE_BACKEND = os.getenv("STATE_BACKEND", "sqlite")
+state_backend = create_state_backend(STATE_BACKEND)
+
+training_status = StatusStore(state_backend, "training")
+if not len(training_status):
+    # One-off import of the status file written by older versions
+    for symbol, status in load_json("training_status.json").items():
+        training_status[symbol] = status
+# Checkpoint state of running training jobs, used to resume them after a restart
+training_jobs = StatusStore(state_backend, "training_job")
+# Training report renders in flight or failed, keyed "{symbol}@{version}"
+report_status = StatusStore(state_backend, "report")
+# Realized forecast error accumulators, keyed "{symbol}:{interval}"
+accuracy_status = StatusStore(state_backend, "accuracy")
+# Historical backfill jobs, keyed "{symbol}:{interval}"
+backfill_status = StatusStore(state_backend, "backfill")
 model_cache = load_pickle("model_cache.pkl")
 scaler_cache = load_pickle("scaler_cache.pkl")
-feature_cache = load_pickle("feature_cache.pkl")
\ No newline at end of file
+feature_cache = load_pickle("feature_cache.pkl")
+manifest_cache = {}
+model_usage = load_json("model_usage.json")
+prediction_cache = {}
+
+# Upstream endpoint; point it at benchmarks/fake_alpha_vantage.py for offline load tests
+ALPHA_VANTAGE_URL = os.getenv("ALPHA_VANTAGE_URL", "https://www.alphavantage.co/query")
+
+# Finest bars fetched per symbol; coarser intervals are resampled from them
+BASE_INTERVAL = os.getenv("BASE_INTERVAL", "1min")
+bar_store = {}
+
+# Models loaded and warmed up in the background at startup: an explicit list
+# plus the N symbols most recently used for predictions.
+PRELOAD_SYMBOLS = [s.strip().upper() for s in os.getenv("PRELOAD_SYMBOLS", "").split(",") if s.strip()]
+PRELOAD_MRU_COUNT = int(os.getenv("PRELOAD_MRU_COUNT", "5"))
+preload_status = {"state": "pending", "symbols": [], "loaded": [], "failed": {}}
+
+# Symbols whose forecasts are recomputed in the background after every bar
+# close; spaced out to stay below the Alpha Vantage per-minute quota.
+WATCHLIST = [s.strip().upper() for s in os.getenv("WATCHLIST", "").split(",") if s.strip()]
+WATCHLIST_INTERVAL = os.getenv("WATCHLIST_INTERVAL", "5min")
+WATCHLIST_STEPS = int(os.getenv("WATCHLIST_STEPS", "10"))
+WATCHLIST_CLOSE_DELAY = float(os.getenv("WATCHLIST_CLOSE_DELAY", "5"))
+UPSTREAM_CALLS_PER_MINUTE = float(os.getenv("UPSTREAM_CALLS_PER_MINUTE", "5"))
+# Month requests of a backfill in flight at once; their starts are still spaced by the limiter
+BACKFILL_CONCURRENCY = int(os.getenv("BACKFILL_CONCURRENCY", "4"))
+BACKFILL_RETRIES = int(os.getenv("BACKFILL_RETRIES", "3"))
+watchlist_status = {"running": False, "symbols": WATCHLIST, "last_run": None, "refreshed": {}, "errors": {}}
+
+# Nightly retraining of the universe (RETRAIN_SYMBOLS, or every published
+# model) inside a window starting at RETRAIN_WINDOW_START ("HH:MM", empty =
+# disabled). Each job gets an equal share of what is left of the window,
+# minus RETRAIN_JOB_OVERHEAD_SECONDS for fetching, evaluating and publishing.
+RETRAIN_SYMBOLS = [s.strip().upper() for s in os.getenv("RETRAIN_SYMBOLS", "").split(",") if s.strip()]
+RETRAIN_WINDOW_START = os.getenv("RETRAIN_WINDOW_START", "")
+RETRAIN_WINDOW_MINUTES = float(os.getenv("RETRAIN_WINDOW_MINUTES", "240"))
+RETRAIN_EPOCHS = int(os.getenv("RETRAIN_EPOCHS", "50"))
+RETRAIN_JOB_OVERHEAD_SECONDS = float(os.getenv("RETRAIN_JOB_OVERHEAD_SECONDS", "60"))
+RETRAIN_MIN_SECONDS = float(os.getenv("RETRAIN_MIN_SECONDS", "120"))
+retrain_status = {"running": False, "window_start": RETRAIN_WINDOW_START, "next_window": None, "last_run": None}
+
+# Micro-batching of concurrent forward passes on the inference thread
+INFERENCE_MAX_BATCH_SIZE = int(os.getenv("INFERENCE_MAX_BATCH_SIZE", "32"))
+INFERENCE_MAX_WAIT_MS = float(os.getenv("INFERENCE_MAX_WAIT_MS", "5"))
+
+# Live accuracy: forecast steps kept in the log, and when a model counts as stale
+# (realized MAPE above ACCURACY_STALE_RATIO x its test MAPE over enough forecasts)
+FORECAST_LOG_STEPS = int(os.getenv("FORECAST_LOG_STEPS", "30"))
+ACCURACY_MIN_FORECASTS = int(os.getenv("ACCURACY_MIN_FORECASTS", "20"))
+ACCURACY_STALE_RATIO = float(os.getenv("ACCURACY_STALE_RATIO", "1.5"))
+
+# Jobs fail with MemoryCeilingExceeded once a process grows past this (0 = no ceiling);
+# MEMORY_TRACEMALLOC_TOP > 0 adds the top allocating lines to each stage's memory report
+MEMORY_CEILING_MB = float(os.getenv("MEMORY_CEILING_MB", "0"))
+MEMORY_TRACEMALLOC_TOP = int(os.getenv("MEMORY_TRACEMALLOC_TOP", "0"))
+
+# Responses at least this large are gzip-compressed when the client accepts it
+GZIP_MINIMUM_SIZE = int(os.getenv("GZIP_MINIMUM_SIZE", "1024"))
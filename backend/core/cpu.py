@@ -0,0 +1,52 @@
+import os
+import signal
+
+
+def available_cpus():
+    """CPUs this process may run on"""
+    try:
+        return sorted(os.sched_getaffinity(0))
+    except AttributeError:  # not available on macOS / Windows
+        return list(range(os.cpu_count() or 1))
+
+
+def parse_cpu_list(text):
+    """"0-3,6" -> [0, 1, 2, 3, 6]; empty -> None"""
+    if not text or not text.strip():
+        return None
+    cpus = set()
+    for part in text.split(","):
+        start, _, end = part.strip().partition("-")
+        cpus.update(range(int(start), int(end or start) + 1))
+    return sorted(cpus)
+
+
+def configure_tf_threads(intra_op_threads, inter_op_threads):
+    """Size TensorFlow's thread pools; must run before TensorFlow executes its first op"""
+    import tensorflow as tf
+
+    if intra_op_threads:
+        tf.config.threading.set_intra_op_parallelism_threads(intra_op_threads)
+    if inter_op_threads:
+        tf.config.threading.set_inter_op_parallelism_threads(inter_op_threads)
+
+
+def exit_with_parent():
+    """Linux: have the kernel kill this process when the process that started it dies (PR_SET_PDEATHSIG)
+
+    Must run in a child started from a thread that lives as long as its
+    process, such as the event loop's.
+    """
+    try:
+        import ctypes
+        ctypes.CDLL("libc.so.6", use_errno=True).prctl(1, signal.SIGKILL)
+    except (OSError, AttributeError):
+        pass
+
+
+def pin_process(cpus=None, nice=0):
+    """Restrict the current process to `cpus` and lower its scheduling priority by `nice`"""
+    if cpus and hasattr(os, "sched_setaffinity"):
+        os.sched_setaffinity(0, cpus)
+    if nice:
+        os.nice(nice)
@@ -0,0 +1,110 @@
+import os
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+MB = 1024 * 1024
+_PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+
+class MemoryCeilingExceeded(MemoryError):
+    """The process grew past the configured ceiling; raised to fail the job before the OOM killer does"""
+
+
+def rss_bytes():
+    """Resident set size of this process (0 where /proc is not available)"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * _PAGE_SIZE
+    except OSError:
+        return 0
+
+
+def peak_rss_bytes():
+    """Kernel high-water mark of the resident set (VmHWM) since start or the last reset"""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return 0
+
+
+def reset_peak_rss():
+    """Restart VmHWM from the current RSS (Linux 4.0+); False where that is not possible"""
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+        return True
+    except OSError:
+        return False
+
+
+def top_allocations(limit):
+    """Source lines holding the most memory allocated since the traces were last cleared"""
+    stats = tracemalloc.take_snapshot().statistics("lineno")[:limit]
+    return [
+        {"where": f"{s.traceback[0].filename}:{s.traceback[0].lineno}", "size_mb": round(s.size / MB, 2)}
+        for s in stats
+    ]
+
+
+class MemoryTracker:
+    """RSS at the start and end of each stage of a job, its peak, and optionally its top allocations
+
+    With `exclusive` (a process that runs only this job, like the training
+    process) the kernel high-water mark is reset per stage, so peaks are
+    exact. In the shared API process the peak is the highest RSS seen at the
+    stage boundaries and in `check()` calls, and includes concurrent requests
+    (as do the tracemalloc traces, which are process-wide). `ceiling_mb` (0 = none) is enforced at the same points.
+    """
+
+    def __init__(self, ceiling_mb=0, tracemalloc_top=0, exclusive=False):
+        self.ceiling = int(ceiling_mb * MB)
+        self.tracemalloc_top = tracemalloc_top
+        self.exclusive = exclusive and reset_peak_rss()
+        self.stages = {}
+        self._peak = 0
+        if tracemalloc_top and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    def check(self, stage):
+        """Note and return the current RSS; raises MemoryCeilingExceeded above the ceiling"""
+        rss = rss_bytes()
+        self._peak = max(self._peak, rss)
+        if self.ceiling and rss > self.ceiling:
+            raise MemoryCeilingExceeded(
+                f"{stage}: RSS {rss / MB:.0f} MB is above the {self.ceiling / MB:.0f} MB ceiling"
+            )
+        return rss
+
+    @contextmanager
+    def stage(self, name):
+        self._peak = 0
+        start = self.check(name)
+        if self.exclusive:
+            reset_peak_rss()
+        if self.tracemalloc_top:
+            # Only what the stage allocates is traced from here; cheaper and
+            # smaller than diffing two snapshots of the whole process
+            tracemalloc.clear_traces()
+            tracemalloc.reset_peak()
+        started = time.perf_counter()
+        try:
+            yield self
+        finally:
+            end = rss_bytes()
+            peak = peak_rss_bytes() if self.exclusive else max(self._peak, end)
+            self.stages[name] = {
+                "rss_start_mb": round(start / MB, 1),
+                "rss_end_mb": round(end / MB, 1),
+                "peak_rss_mb": round(max(peak, end) / MB, 1),
+                "delta_mb": round((end - start) / MB, 1),
+                "seconds": round(time.perf_counter() - started, 3),
+            }
+            if self.tracemalloc_top:
+                self.stages[name]["traced_peak_mb"] = round(tracemalloc.get_traced_memory()[1] / MB, 1)
+                self.stages[name]["top_allocations"] = top_allocations(self.tracemalloc_top)
+        self.check(name)
@@ -0,0 +1,26 @@
+from prometheus_client import Gauge
+
+from core.memory import MB
+
+# Per job kind ("train", "predict") and stage; the process-wide RSS is
+# already exported by the default process collector.
+STAGE_PEAK_RSS = Gauge(
+    "job_stage_peak_rss_bytes", "Peak RSS during the last run of a job stage", ["job", "stage"]
+)
+STAGE_MAX_PEAK_RSS = Gauge(
+    "job_stage_max_peak_rss_bytes", "Highest peak RSS of a job stage since start", ["job", "stage"]
+)
+STAGE_RSS_DELTA = Gauge(
+    "job_stage_rss_delta_bytes", "RSS growth over the last run of a job stage", ["job", "stage"]
+)
+_max_peaks = {}
+
+
+def export_stages(job, stages):
+    """Publish MemoryTracker.stages of a finished run"""
+    for stage, stats in stages.items():
+        peak = stats["peak_rss_mb"] * MB
+        STAGE_PEAK_RSS.labels(job, stage).set(peak)
+        STAGE_RSS_DELTA.labels(job, stage).set(stats["delta_mb"] * MB)
+        _max_peaks[job, stage] = max(_max_peaks.get((job, stage), 0), peak)
+        STAGE_MAX_PEAK_RSS.labels(job, stage).set(_max_peaks[job, stage])
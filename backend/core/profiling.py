@@ -0,0 +1,90 @@
+import os
+import pstats
+import asyncio
+import functools
+import cProfile
+import contextvars
+from contextlib import contextmanager, nullcontext
+from datetime import datetime
+from pathlib import Path
+
+from core.state_manager import STATE_DIR
+
+PROFILING_ENABLED = os.getenv("PROFILING_ENABLED", "false").lower() in ("1", "true", "yes")
+PROFILE_DIR = Path(STATE_DIR) / "profiles"
+PROFILE_HEADER = "X-Profile"
+PROFILED_PATHS = ("/api/predict", "/api/stock-data")
+
+# Profilers of the request being profiled; worker threads add their own to it
+_active_profilers = contextvars.ContextVar("active_profilers", default=None)
+
+# cProfile hooks the whole event-loop thread, not one request, and two
+# profilers cannot be active on it at once: profiled requests take turns
+request_profile_lock = asyncio.Lock()
+
+
+def profile_requested(request):
+    """Opt-in per request through the X-Profile header or ?profile=1"""
+    flag = request.headers.get(PROFILE_HEADER) or request.query_params.get("profile")
+    return PROFILING_ENABLED and (flag or "").lower() in ("1", "true", "yes")
+
+
+@contextmanager
+def profiled(kind, name):
+    """Profile the enclosed block and save it as state/profiles/{kind}-{name}-{time}.pstats"""
+    PROFILE_DIR.mkdir(parents=True, exist_ok=True)
+    profilers = [cProfile.Profile()]
+    token = _active_profilers.set(profilers)
+    path = PROFILE_DIR / f"{kind}-{name.strip('/').replace('/', '_')}-{datetime.now():%Y%m%d%H%M%S%f}.pstats"
+    profilers[0].enable()
+    try:
+        yield path
+    finally:
+        profilers[0].disable()
+        _active_profilers.reset(token)
+        stats = pstats.Stats(profilers[0])
+        for profiler in profilers[1:]:
+            stats.add(profiler)
+        stats.dump_stats(path)
+
+
+def profile_thread():
+    """Also profile the current thread while a profiled request is running"""
+    profilers = _active_profilers.get()
+    if profilers is None:
+        return nullcontext()
+    return _profile_thread(profilers)
+
+
+@contextmanager
+def _profile_thread(profilers):
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        profilers.append(profiler)
+
+
+def profiles_thread(function):
+    """Decorator for work handed to thread pools: it is included in the profile
+    of the request that submitted it (the submitter must copy its context)"""
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+        with profile_thread():
+            return function(*args, **kwargs)
+    return wrapper
+
+
+def list_profiles():
+    if not PROFILE_DIR.exists():
+        return []
+    return [
+        {
+            "name": path.name,
+            "size_bytes": path.stat().st_size,
+            "created_at": datetime.fromtimestamp(path.stat().st_mtime).isoformat(),
+        }
+        for path in sorted(PROFILE_DIR.glob("*.pstats"), key=lambda p: p.stat().st_mtime, reverse=True)
+    ]
@@ -0,0 +1,339 @@
+import os
+import json
+import time
+import socket
+import sqlite3
+import threading
+import importlib
+
+from core.state_manager import STATE_DIR
+
+# A lock whose holder has not renewed it for this long is free, wherever the
+# holder runs; holders renew theirs every third of it (see start_heartbeat)
+LOCK_LEASE_SECONDS = float(os.getenv("LOCK_LEASE_SECONDS", "120"))
+
+
+def process_owner():
+    """Identifies this worker process as the holder of a lock"""
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def owner_alive(owner):
+    """False only when the owner is a process on this host that has exited"""
+    host, _, pid = owner.rpartition(":")
+    if host != socket.gethostname():
+        return True
+    try:
+        os.kill(int(pid), 0)
+    except ProcessLookupError:
+        return False
+    except (PermissionError, ValueError):
+        return True
+    return True
+
+
+def lock_free(holder, renewed_at, owner):
+    """Whether `owner` may take a lock `holder` last renewed at `renewed_at`
+
+    The pid check frees the locks of dead workers on this host at once; the
+    lease frees everyone else's, e.g. those of a container that was replaced.
+    """
+    return (
+        holder == owner
+        or not owner_alive(holder)
+        or time.time() - renewed_at > LOCK_LEASE_SECONDS
+    )
+
+
+class StateBackend:
+    """State shared by every uvicorn worker: statuses, locks and model versions.
+
+    Statuses are JSON documents grouped by kind ("training", ...). Locks are
+    named and held by a process owner under a lease its heartbeat renews, so
+    the locks of a worker that is gone, even on another host, become free.
+    Model versions let each worker notice that another one has published a
+    new model.
+    """
+
+    _heartbeat = None
+
+    def get_status(self, kind, key):
+        raise NotImplementedError
+
+    def set_status(self, kind, key, data):
+        raise NotImplementedError
+
+    def update_status(self, kind, key, fields):
+        """Merge `fields` into a status document and return the result"""
+        raise NotImplementedError
+
+    def delete_status(self, kind, key):
+        raise NotImplementedError
+
+    def list_statuses(self, kind):
+        raise NotImplementedError
+
+    def acquire_lock(self, name, owner):
+        """Take the lock unless a live owner holds it; True on success"""
+        raise NotImplementedError
+
+    def release_lock(self, name, owner):
+        raise NotImplementedError
+
+    def refresh_locks(self, owner):
+        """Renew the lease of every lock `owner` holds"""
+        raise NotImplementedError
+
+    def start_heartbeat(self, owner, interval=None):
+        """Keep renewing `owner`'s leases from a daemon thread, for the life of the process"""
+        if self._heartbeat is not None:
+            return
+        interval = interval or LOCK_LEASE_SECONDS / 3
+
+        def beat():
+            while True:
+                time.sleep(interval)
+                try:
+                    self.refresh_locks(owner)
+                except Exception:
+                    # e.g. the database is busy; the next beat is still within the lease
+                    pass
+        self._heartbeat = threading.Thread(target=beat, daemon=True, name="lock-heartbeat")
+        self._heartbeat.start()
+
+    def lock_owner(self, name):
+        raise NotImplementedError
+
+    def publish_model_version(self, symbol, version):
+        raise NotImplementedError
+
+    def get_model_version(self, symbol):
+        raise NotImplementedError
+
+
+class MemoryStateBackend(StateBackend):
+    """Single-process backend (uvicorn without --workers)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._statuses = {}
+        self._locks = {}
+        self._versions = {}
+
+    def get_status(self, kind, key):
+        data = self._statuses.get((kind, key))
+        return dict(data) if data is not None else None
+
+    def set_status(self, kind, key, data):
+        self._statuses[(kind, key)] = dict(data)
+
+    def update_status(self, kind, key, fields):
+        with self._lock:
+            data = {**self._statuses.get((kind, key), {}), **fields}
+            self._statuses[(kind, key)] = data
+            return dict(data)
+
+    def delete_status(self, kind, key):
+        self._statuses.pop((kind, key), None)
+
+    def list_statuses(self, kind):
+        return {key: dict(data) for (k, key), data in list(self._statuses.items()) if k == kind}
+
+    def acquire_lock(self, name, owner):
+        with self._lock:
+            holder, renewed_at = self._locks.get(name, (None, 0.0))
+            if holder is not None and not lock_free(holder, renewed_at, owner):
+                return False
+            self._locks[name] = (owner, time.time())
+            return True
+
+    def release_lock(self, name, owner):
+        with self._lock:
+            if self._locks.get(name, (None,))[0] == owner:
+                del self._locks[name]
+
+    def refresh_locks(self, owner):
+        with self._lock:
+            for name, (holder, _) in self._locks.items():
+                if holder == owner:
+                    self._locks[name] = (owner, time.time())
+
+    def lock_owner(self, name):
+        return self._locks.get(name, (None,))[0]
+
+    def publish_model_version(self, symbol, version):
+        self._versions[symbol] = version
+
+    def get_model_version(self, symbol):
+        return self._versions.get(symbol)
+
+
+class SQLiteStateBackend(StateBackend):
+    """Default backend: one SQLite file under state/, safe across processes.
+
+    SQLite's file locking serializes writers; read-modify-write operations run
+    inside BEGIN IMMEDIATE so two workers can never interleave them.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS status (
+            kind TEXT NOT NULL, key TEXT NOT NULL, data TEXT NOT NULL, updated_at REAL NOT NULL,
+            PRIMARY KEY (kind, key)
+        );
+        CREATE TABLE IF NOT EXISTS locks (
+            -- acquired_at is moved forward by every heartbeat of the owner
+            name TEXT PRIMARY KEY, owner TEXT NOT NULL, acquired_at REAL NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS model_versions (
+            symbol TEXT PRIMARY KEY, version TEXT, updated_at REAL NOT NULL
+        );
+    """
+
+    def __init__(self, path=os.path.join(STATE_DIR, "shared_state.db")):
+        self.path = path
+        self._local = threading.local()
+        self._connection().executescript(self.SCHEMA)
+
+    def _connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    class _Transaction:
+        def __init__(self, conn):
+            self.conn = conn
+
+        def __enter__(self):
+            self.conn.execute("BEGIN IMMEDIATE")
+            return self.conn
+
+        def __exit__(self, exc_type, exc, tb):
+            self.conn.execute("ROLLBACK" if exc_type else "COMMIT")
+
+    def _transaction(self):
+        return self._Transaction(self._connection())
+
+    def get_status(self, kind, key):
+        row = self._connection().execute(
+            "SELECT data FROM status WHERE kind = ? AND key = ?", (kind, key)
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def set_status(self, kind, key, data):
+        self._connection().execute(
+            "INSERT OR REPLACE INTO status (kind, key, data, updated_at) VALUES (?, ?, ?, ?)",
+            (kind, key, json.dumps(data, default=str), time.time())
+        )
+
+    def update_status(self, kind, key, fields):
+        with self._transaction() as conn:
+            row = conn.execute("SELECT data FROM status WHERE kind = ? AND key = ?", (kind, key)).fetchone()
+            data = {**(json.loads(row[0]) if row else {}), **fields}
+            conn.execute(
+                "INSERT OR REPLACE INTO status (kind, key, data, updated_at) VALUES (?, ?, ?, ?)",
+                (kind, key, json.dumps(data, default=str), time.time())
+            )
+        return data
+
+    def delete_status(self, kind, key):
+        self._connection().execute("DELETE FROM status WHERE kind = ? AND key = ?", (kind, key))
+
+    def list_statuses(self, kind):
+        rows = self._connection().execute("SELECT key, data FROM status WHERE kind = ?", (kind,))
+        return {key: json.loads(data) for key, data in rows}
+
+    def acquire_lock(self, name, owner):
+        with self._transaction() as conn:
+            row = conn.execute("SELECT owner, acquired_at FROM locks WHERE name = ?", (name,)).fetchone()
+            if row is not None and not lock_free(row[0], row[1], owner):
+                return False
+            conn.execute(
+                "INSERT OR REPLACE INTO locks (name, owner, acquired_at) VALUES (?, ?, ?)",
+                (name, owner, time.time())
+            )
+            return True
+
+    def release_lock(self, name, owner):
+        self._connection().execute("DELETE FROM locks WHERE name = ? AND owner = ?", (name, owner))
+
+    def refresh_locks(self, owner):
+        self._connection().execute("UPDATE locks SET acquired_at = ? WHERE owner = ?", (time.time(), owner))
+
+    def lock_owner(self, name):
+        row = self._connection().execute("SELECT owner FROM locks WHERE name = ?", (name,)).fetchone()
+        return row[0] if row else None
+
+    def publish_model_version(self, symbol, version):
+        self._connection().execute(
+            "INSERT OR REPLACE INTO model_versions (symbol, version, updated_at) VALUES (?, ?, ?)",
+            (symbol, version, time.time())
+        )
+
+    def get_model_version(self, symbol):
+        row = self._connection().execute(
+            "SELECT version FROM model_versions WHERE symbol = ?", (symbol,)
+        ).fetchone()
+        return row[0] if row else None
+
+
+BACKENDS = {"sqlite": SQLiteStateBackend, "memory": MemoryStateBackend}
+
+
+def create_state_backend(name):
+    """Backend by name, or any StateBackend subclass given as "module:Class" """
+    if ":" in name:
+        module_name, class_name = name.split(":", 1)
+        return getattr(importlib.import_module(module_name), class_name)()
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown STATE_BACKEND '{name}'. Use one of {list(BACKENDS)} or module:Class")
+    return BACKENDS[name]()
+
+
+class StatusStore:
+    """Dict-like view of one kind of status in the shared backend.
+
+    Reads return snapshots, so changes must go through `patch` (or item
+    assignment) to be seen by the other workers.
+    """
+
+    def __init__(self, backend, kind):
+        self.backend = backend
+        self.kind = kind
+
+    def __contains__(self, key):
+        return self.backend.get_status(self.kind, key) is not None
+
+    def __getitem__(self, key):
+        data = self.backend.get_status(self.kind, key)
+        if data is None:
+            raise KeyError(key)
+        return data
+
+    def __iter__(self):
+        return iter(self.backend.list_statuses(self.kind))
+
+    def get(self, key, default=None):
+        data = self.backend.get_status(self.kind, key)
+        return default if data is None else data
+
+    def __setitem__(self, key, data):
+        self.backend.set_status(self.kind, key, data)
+
+    def __delitem__(self, key):
+        self.backend.delete_status(self.kind, key)
+
+    def patch(self, key, fields):
+        return self.backend.update_status(self.kind, key, fields)
+
+    def items(self):
+        return self.backend.list_statuses(self.kind).items()
+
+    def values(self):
+        return self.backend.list_statuses(self.kind).values()
+
+    def __len__(self):
+        return len(self.backend.list_statuses(self.kind))
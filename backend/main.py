@@ -1,8 +1,23 @@
 
+import asyncio
+import threading
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
+from prometheus_client import make_asgi_app
+from fastapi.responses import JSONResponse
 from api import api_routes
-from core.config import app,logger, training_status, model_cache, scaler_cache, feature_cache
+from api.api_logic import get_preload_symbols, preload_models
+from api.retrain_scheduler import start_retrain_scheduler, stop_retrain_scheduler
+from api.watchlist import start_watchlist, stop_watchlist
+from api.inference_worker import inference_worker
+from api.training_jobs import claim_interrupted_jobs
+from api.reports import shutdown_reports
+from api.backfill import resume_backfills
+from model.LSTM import DEFAULT_ARCHITECTURE
+from core.config import app,logger, state_backend, GZIP_MINIMUM_SIZE, model_cache, scaler_cache, feature_cache, model_usage, preload_status, watchlist_status, retrain_status
+from core.state_backend import process_owner, LOCK_LEASE_SECONDS
 from core.state_manager import save_json,save_pickle
+from core.profiling import PROFILING_ENABLED, PROFILED_PATHS, profiled, profile_requested, request_profile_lock
 import tensorflow as tf
 
 tf.config.set_visible_devices([], 'GPU')
@@ -17,6 +32,22 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(GZipMiddleware, minimum_size=GZIP_MINIMUM_SIZE)
+
+
+# Opt-in per-request profiling; the middleware is not even installed when disabled.
+# A profile covers everything the event loop ran during the request, including
+# other requests served meanwhile; profiled requests themselves run one at a time.
+if PROFILING_ENABLED:
+    @app.middleware("http")
+    async def profile_request(request, call_next):
+        if not (request.url.path.startswith(PROFILED_PATHS) and profile_requested(request)):
+            return await call_next(request)
+        async with request_profile_lock:
+            with profiled("request", request.url.path) as path:
+                response = await call_next(request)
+        response.headers["X-Profile-File"] = path.name
+        return response
 
 
 # Base URL for your API
@@ -34,13 +65,117 @@ def health_check():
     return {"status":"ok","message":"API is ok"}
 
 
+#route for readiness probe
+@app.get("/ready")
+def readiness_check():
+    """Ready once the startup model preload has finished"""
+    ready = preload_status["state"] == "ready"
+    return JSONResponse(
+        status_code=200 if ready else 503,
+        content={"ready": ready, "preload": preload_status, "watchlist": watchlist_status, "retrain": retrain_status}
+    )
+
+
 # add route here
 app.include_router(api_routes.router)
 
+# Prometheus metrics, including the per-stage memory gauges of core/metrics
+app.mount("/metrics", make_asgi_app())
+
+
+@app.on_event("startup")
+def start_inference_worker():
+    inference_worker.start()
+
+
+@app.on_event("startup")
+def start_preload():
+    symbols = get_preload_symbols()
+    threading.Thread(target=preload_models, args=(symbols,), daemon=True, name="model-preload").start()
+    logger.info(f"Preloading models for {symbols}")
+
+
+@app.on_event("startup")
+async def start_scheduler():
+    start_watchlist()
+    start_retrain_scheduler()
+
+
+@app.on_event("startup")
+def start_lock_heartbeat():
+    # Without it every lock of this worker would lapse after LOCK_LEASE_SECONDS
+    state_backend.start_heartbeat(process_owner())
+
+
+# Training runs resumed after a restart; keeps the tasks referenced until done
+resumed_training = set()
+
+
+@app.on_event("startup")
+async def resume_training():
+    for job in claim_interrupted_jobs():
+        task = asyncio.create_task(api_routes.train_model_background(
+            job["symbol"], job["interval"], job["sequence_length"],
+            job["prediction_horizon"], job["epochs"], job.get("architecture", DEFAULT_ARCHITECTURE),
+            resume=job
+        ))
+        resumed_training.add(task)
+        task.add_done_callback(resumed_training.discard)
+
+
+@app.on_event("startup")
+async def resume_backfill():
+    resumed = resume_backfills()
+    if resumed:
+        logger.info(f"Resumed backfills {resumed}")
+
+
+async def reclaim_interrupted_work():
+    """Look for interrupted work again every lease period
+
+    At startup the locks of a worker on another host (e.g. the container
+    this one replaced) still look held until their lease runs out.
+    """
+    while True:
+        await asyncio.sleep(LOCK_LEASE_SECONDS)
+        await resume_training()
+        await resume_backfill()
+
+
+reclaim_task = None
+
+
+@app.on_event("startup")
+async def start_reclaim():
+    global reclaim_task
+    reclaim_task = asyncio.create_task(reclaim_interrupted_work())
+
+
+@app.on_event("shutdown")
+async def stop_reclaim():
+    if reclaim_task is not None:
+        reclaim_task.cancel()
+
+
+@app.on_event("shutdown")
+async def stop_scheduler():
+    await stop_watchlist()
+    await stop_retrain_scheduler()
+
+
+@app.on_event("shutdown")
+def stop_report_worker():
+    shutdown_reports()
+
+
+@app.on_event("shutdown")
+def stop_inference_worker():
+    inference_worker.stop()
+
 
 @app.on_event("shutdown")
 def save_state():
-    save_json(training_status, "training_status.json")
+    save_json(model_usage, "model_usage.json")
     save_pickle(model_cache, "model_cache.pkl")
     save_pickle(scaler_cache, "scaler_cache.pkl")
     save_pickle(feature_cache, "feature_cache.pkl")
@@ -1,23 +1,39 @@
+from functools import partial
+
 from tensorflow.keras.models import Sequential
-from tensorflow.keras.layers import LSTM, Dense, Dropout, BatchNormalization
+from tensorflow.keras.layers import (
+    LSTM, GRU, Conv1D, GlobalAveragePooling1D, Dense, Dropout, BatchNormalization
+)
 from tensorflow.keras.optimizers import Adam
 
+DEFAULT_ARCHITECTURE = "stacked_lstm"
+
+
+def compile_model(model):
+    model.compile(
+        optimizer=Adam(learning_rate=0.001),
+        loss='mse',
+        metrics=['mae']
+    )
+    return model
+
+
 # intialising the LSTM model
-def build_lstm_model(input_shape, prediction_horizon=1):
+def build_lstm_model(input_shape, prediction_horizon=1, units=(128, 64, 32)):
     """Build and compile LSTM model"""
     model = Sequential([
         # First LSTM layer
-        LSTM(128, return_sequences=True, input_shape=input_shape),
+        LSTM(units[0], return_sequences=True, input_shape=input_shape),
         Dropout(0.2),
         BatchNormalization(),
         
         # Second LSTM layer
-        LSTM(64, return_sequences=True),
+        LSTM(units[1], return_sequences=True),
         Dropout(0.2),
         BatchNormalization(),
         
         # Third LSTM layer
-        LSTM(32, return_sequences=False),
+        LSTM(units[2], return_sequences=False),
         Dropout(0.2),
         
         # Dense layers
@@ -27,10 +43,49 @@ def build_lstm_model(input_shape, prediction_horizon=1):
     ])
     
     # Compile model
-    model.compile(
-        optimizer=Adam(learning_rate=0.001),
-        loss='mse',
-        metrics=['mae']
-    )
-    
-    return model
\ No newline at end of file
+    return compile_model(model)
+
+
+def build_gru_model(input_shape, prediction_horizon=1, units=64):
+    """Single GRU layer: far fewer weights and sequential steps than the stack"""
+    model = Sequential([
+        GRU(units, input_shape=input_shape),
+        Dropout(0.2),
+        Dense(16, activation='relu'),
+        Dropout(0.1),
+        Dense(prediction_horizon)
+    ])
+    return compile_model(model)
+
+
+def build_conv1d_model(input_shape, prediction_horizon=1, filters=32):
+    """Small 1-D conv net; no recurrence, so the whole window is processed in parallel"""
+    model = Sequential([
+        Conv1D(filters, kernel_size=5, activation='relu', input_shape=input_shape),
+        Dropout(0.2),
+        Conv1D(filters, kernel_size=3, activation='relu'),
+        GlobalAveragePooling1D(),
+        Dense(16, activation='relu'),
+        Dropout(0.1),
+        Dense(prediction_horizon)
+    ])
+    return compile_model(model)
+
+
+# Architectures selectable with TrainingRequest.architecture. Every one keeps
+# Dropout layers so Monte Carlo dropout bands work for all of them.
+ARCHITECTURES = {
+    "stacked_lstm": build_lstm_model,
+    "stacked_lstm_narrow": partial(build_lstm_model, units=(64, 32, 16)),
+    "gru": build_gru_model,
+    "gru_narrow": partial(build_gru_model, units=32),
+    "conv1d": build_conv1d_model,
+    "conv1d_narrow": partial(build_conv1d_model, filters=16),
+}
+
+
+def build_model(architecture, input_shape, prediction_horizon=1):
+    """Build and compile a registered architecture"""
+    if architecture not in ARCHITECTURES:
+        raise ValueError(f"Unknown architecture '{architecture}'. Use one of {list(ARCHITECTURES)}")
+    return ARCHITECTURES[architecture](input_shape, prediction_horizon=prediction_horizon)
\ No newline at end of file
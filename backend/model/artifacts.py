@@ -0,0 +1,200 @@
+import os
+import json
+import shutil
+import uuid
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+from sklearn.preprocessing import MinMaxScaler
+
+# Layout of a published model:
+#   LSTM_models/{symbol}/current                    -> name of the live version
+#   LSTM_models/{symbol}/versions/{version}/manifest.json
+#   LSTM_models/{symbol}/versions/{version}/model.h5
+#   LSTM_models/{symbol}/versions/{version}/scaler.npy
+#   LSTM_models/{symbol}/versions/{version}/report_data.npz     -> series the training report is drawn from
+#   LSTM_models/{symbol}/versions/{version}/training_report.png -> rendered after publishing
+ARTIFACTS_ROOT = "LSTM_models"
+MANIFEST_FILE = "manifest.json"
+MODEL_FILE = "model.h5"
+SCALER_FILE = "scaler.npy"
+SUMMARY_FILE = "model_summary.txt"
+REPORT_DATA_FILE = "report_data.npz"
+REPORT_FILE = "training_report.png"
+CURRENT_POINTER = "current"
+MAX_BUNDLE_VERSIONS = int(os.getenv("MAX_BUNDLE_VERSIONS", "3"))
+
+# Row order of the arrays stored in scaler.npy
+SCALER_ROWS = ["data_min_", "data_max_", "data_range_", "scale_", "min_"]
+
+
+def symbol_dir(symbol):
+    return Path(ARTIFACTS_ROOT) / symbol
+
+
+def bundle_dir(symbol, version):
+    return symbol_dir(symbol) / "versions" / version
+
+
+def new_version():
+    """Sortable, unique version id for a bundle"""
+    return f"{datetime.now().strftime('%Y%m%d%H%M%S%f')}-{uuid.uuid4().hex[:4]}"
+
+
+def _write_atomic(path, text):
+    tmp_path = f"{path}.{uuid.uuid4().hex[:6]}.tmp"
+    with open(tmp_path, "w") as f:
+        f.write(text)
+    os.replace(tmp_path, path)
+
+
+def save_scaler_arrays(scaler, path):
+    """Store a fitted MinMaxScaler as a plain float64 array"""
+    params = np.vstack([getattr(scaler, name) for name in SCALER_ROWS]).astype(np.float64)
+    np.save(path, params)
+
+
+def load_scaler_arrays(path, feature_range=(0, 1), mmap=True):
+    """Rebuild a MinMaxScaler from scaler.npy without unpickling"""
+    params = np.load(path, mmap_mode="r" if mmap else None)
+    scaler = MinMaxScaler(feature_range=tuple(feature_range))
+    for name, row in zip(SCALER_ROWS, params):
+        setattr(scaler, name, row)
+    scaler.n_features_in_ = params.shape[1]
+    scaler.n_samples_seen_ = 0
+    return scaler
+
+
+def publish_bundle(model, scaler, feature_columns, metrics, symbol, extra=None, report_data=None):
+    """Write a new versioned bundle and atomically make it the current one
+
+    `report_data` (name -> 1-d array) is stored for rendering the training
+    report later, outside the training run.
+    """
+    version = new_version()
+    versions_root = symbol_dir(symbol) / "versions"
+    versions_root.mkdir(parents=True, exist_ok=True)
+
+    # Everything is written to a staging directory first; a reader can never
+    # see a half written bundle because the rename below is atomic.
+    staging = versions_root / f".staging-{version}"
+    staging.mkdir()
+    try:
+        model.save(str(staging / MODEL_FILE))
+        save_scaler_arrays(scaler, staging / SCALER_FILE)
+        with open(staging / SUMMARY_FILE, "w") as f:
+            model.summary(print_fn=lambda x, *args, **kwargs: f.write(x + "\n"))
+        files = [MODEL_FILE, SCALER_FILE, SUMMARY_FILE]
+        if report_data:
+            np.savez(staging / REPORT_DATA_FILE, **{k: np.asarray(v, dtype=np.float32) for k, v in report_data.items()})
+            files.append(REPORT_DATA_FILE)
+
+        manifest = {
+            "symbol": symbol,
+            "version": version,
+            "created_at": datetime.now().isoformat(),
+            "features": list(feature_columns),
+            "metrics": {k: float(v) for k, v in metrics.items()},
+            "input_shape": [int(d) for d in model.input_shape[1:]],
+            "scaler_feature_range": list(scaler.feature_range),
+            "model_architecture": "LSTM with technical indicators",
+            "files": files,
+        }
+        if extra:
+            manifest.update(extra)
+        _write_atomic(staging / MANIFEST_FILE, json.dumps(manifest, indent=2))
+
+        os.rename(staging, versions_root / version)
+    except Exception:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+
+    _write_atomic(symbol_dir(symbol) / CURRENT_POINTER, version)
+    prune_versions(symbol)
+    return manifest
+
+
+def prune_versions(symbol, keep=MAX_BUNDLE_VERSIONS):
+    """Remove old bundles, never touching the current one"""
+    current = read_current_version(symbol)
+    versions_root = symbol_dir(symbol) / "versions"
+    versions = sorted(
+        p.name for p in versions_root.iterdir()
+        if p.is_dir() and not p.name.startswith(".")
+    )
+    for version in versions[:-keep] if keep > 0 else []:
+        if version != current:
+            shutil.rmtree(versions_root / version, ignore_errors=True)
+
+
+def read_current_version(symbol):
+    try:
+        return (symbol_dir(symbol) / CURRENT_POINTER).read_text().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+def read_manifest(symbol, version=None):
+    """Read a bundle manifest (the current one by default)"""
+    version = version or read_current_version(symbol)
+    if version is None:
+        return None
+    try:
+        with open(bundle_dir(symbol, version) / MANIFEST_FILE) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def list_manifests():
+    """Current manifest of every symbol, plus bare entries for legacy dirs"""
+    root = Path(ARTIFACTS_ROOT)
+    if not root.exists():
+        return []
+
+    manifests = []
+    for model_dir in sorted(root.iterdir()):
+        if not model_dir.is_dir():
+            continue
+        manifest = read_manifest(model_dir.name)
+        if manifest is None:
+            manifest = {"symbol": model_dir.name, "version": None, "status": "incomplete"}
+        manifests.append(manifest)
+    return manifests
+
+
+def list_versions(symbol):
+    """Manifests of every retained bundle of a symbol, oldest first"""
+    versions_root = symbol_dir(symbol) / "versions"
+    if not versions_root.exists():
+        return []
+    manifests = (
+        read_manifest(symbol, p.name) for p in sorted(versions_root.iterdir())
+        if p.is_dir() and not p.name.startswith(".")
+    )
+    return [manifest for manifest in manifests if manifest is not None]
+
+
+def load_bundle(symbol):
+    """Load model, scaler, feature columns and manifest of the current bundle"""
+    manifest = read_manifest(symbol)
+    if manifest is None:
+        raise FileNotFoundError(f"No published bundle for {symbol}")
+
+    path = bundle_dir(symbol, manifest["version"])
+    # Imported here so processes that only read the layout (report rendering) never load TensorFlow
+    import tensorflow as tf
+
+    model = tf.keras.models.load_model(str(path / MODEL_FILE), compile=False)
+    scaler = load_scaler_arrays(path / SCALER_FILE, manifest.get("scaler_feature_range", (0, 1)))
+    scaler.feature_names_in_ = np.asarray(manifest["features"], dtype=object)
+    return model, scaler, manifest["features"], manifest
+
+
+def has_bundle(symbol):
+    return read_current_version(symbol) is not None
+
+
+def delete_bundles(symbol):
+    shutil.rmtree(symbol_dir(symbol), ignore_errors=True)
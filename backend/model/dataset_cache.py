@@ -0,0 +1,158 @@
+import os
+import json
+import time
+import shutil
+import hashlib
+import uuid
+from pathlib import Path
+
+import numpy as np
+from sklearn.preprocessing import MinMaxScaler
+
+from model.artifacts import save_scaler_arrays, load_scaler_arrays
+from model.feature_engineering import FEATURE_COLUMNS, make_sequences, split_index
+from model.indicators import PRICE_VOLUME_COLUMNS, compute_features
+
+# Layout of a cached dataset:
+#   state/datasets/{symbol}_{interval}_{key}/meta.json
+#   state/datasets/{symbol}_{interval}_{key}/scaled.npy   -> scaled feature rows, memory-mapped
+#   state/datasets/{symbol}_{interval}_{key}/scaler.npy
+DATASET_CACHE_DIR = os.getenv("DATASET_CACHE_DIR", os.path.join("state", "datasets"))
+DATASET_CACHE_MAX_MB = float(os.getenv("DATASET_CACHE_MAX_MB", "512"))
+META_FILE = "meta.json"
+SCALED_FILE = "scaled.npy"
+SCALER_FILE = "scaler.npy"
+
+
+def data_version(df):
+    """Hash of the raw bars a dataset is built from"""
+    digest = hashlib.sha1(df.index.asi8.tobytes())
+    digest.update(np.ascontiguousarray(df[PRICE_VOLUME_COLUMNS].to_numpy(dtype=np.float64)).tobytes())
+    return digest.hexdigest()[:16]
+
+
+def dataset_key(symbol, interval, feature_columns, sequence_length, prediction_horizon, version):
+    params = [symbol, interval, list(feature_columns), sequence_length, prediction_horizon, version]
+    return hashlib.sha1(json.dumps(params).encode()).hexdigest()[:16]
+
+
+def dataset_dir(symbol, interval, key):
+    return Path(DATASET_CACHE_DIR) / f"{symbol}_{interval}_{key}"
+
+
+def _build(df, feature_columns, sequence_length, prediction_horizon):
+    """Indicators, NaN removal and scaler fit: the expensive part of preparing a dataset"""
+    features = compute_features(df, feature_columns)
+    features = features[~np.isnan(features).any(axis=1)]
+    if len(features) < sequence_length + prediction_horizon:
+        raise ValueError(f"Not enough data. Need at least {sequence_length + prediction_horizon} rows")
+
+    scaler = MinMaxScaler(feature_range=(0, 1))
+    scaled_data = scaler.fit_transform(features)
+    return scaled_data, scaler
+
+
+def _store(path, scaled_data, scaler, meta):
+    """Write the entry to a staging directory and rename it into place"""
+    staging = path.with_name(f".staging-{path.name}-{uuid.uuid4().hex[:6]}")
+    staging.mkdir(parents=True)
+    try:
+        np.save(staging / SCALED_FILE, scaled_data)
+        save_scaler_arrays(scaler, staging / SCALER_FILE)
+        with open(staging / META_FILE, "w") as f:
+            json.dump(meta, f, indent=2)
+        os.rename(staging, path)
+    except OSError:
+        # Another worker published the same entry first
+        shutil.rmtree(staging, ignore_errors=True)
+        if not (path / META_FILE).exists():
+            raise
+
+
+def _load(path):
+    with open(path / META_FILE) as f:
+        meta = json.load(f)
+    scaled_data = np.load(path / SCALED_FILE, mmap_mode="r")
+    scaler = load_scaler_arrays(path / SCALER_FILE, meta["scaler_feature_range"], mmap=False)
+    # Mark the entry as recently used for eviction
+    os.utime(path)
+    return scaled_data, scaler, meta
+
+
+def entry_size(path):
+    return sum(f.stat().st_size for f in path.iterdir() if f.is_file())
+
+
+def evict_datasets(max_bytes=None, keep=None):
+    """Delete least recently used entries until the cache fits in `max_bytes`"""
+    root = Path(DATASET_CACHE_DIR)
+    if not root.exists():
+        return []
+    max_bytes = DATASET_CACHE_MAX_MB * 1024 * 1024 if max_bytes is None else max_bytes
+
+    entries = sorted(
+        (p for p in root.iterdir() if p.is_dir() and not p.name.startswith(".")),
+        key=lambda p: p.stat().st_mtime
+    )
+    total = sum(entry_size(p) for p in entries)
+    evicted = []
+    for path in entries:
+        if total <= max_bytes:
+            break
+        if keep is not None and path == keep:
+            continue
+        total -= entry_size(path)
+        shutil.rmtree(path, ignore_errors=True)
+        evicted.append(path.name)
+    return evicted
+
+
+def prepare_dataset(df, symbol, interval, sequence_length=60, prediction_horizon=1,
+                    feature_columns=FEATURE_COLUMNS):
+    """Training windows for `df`, built once per data version and then read from the cache
+
+    Returns the same tuple as prepare_lstm_data plus a dict describing the
+    cache entry. X/y are views of the memory-mapped scaled series.
+    """
+    feature_columns = list(feature_columns)
+    version = data_version(df)
+    key = dataset_key(symbol, interval, feature_columns, sequence_length, prediction_horizon, version)
+    path = dataset_dir(symbol, interval, key)
+
+    cached = (path / META_FILE).exists()
+    if not cached:
+        start = time.perf_counter()
+        scaled_data, scaler = _build(df, feature_columns, sequence_length, prediction_horizon)
+        n_samples = len(scaled_data) - sequence_length - prediction_horizon + 1
+        meta = {
+            "symbol": symbol,
+            "interval": interval,
+            "features": feature_columns,
+            "sequence_length": sequence_length,
+            "prediction_horizon": prediction_horizon,
+            "data_version": version,
+            "rows": len(scaled_data),
+            "samples": n_samples,
+            "train_size": split_index(n_samples),
+            "scaler_feature_range": list(scaler.feature_range),
+            "build_seconds": round(time.perf_counter() - start, 3),
+            "created_at": time.time(),
+        }
+        _store(path, scaled_data, scaler, meta)
+        evict_datasets(keep=path)
+
+    *dataset, info = load_dataset(symbol, interval, key)
+    info["cached"] = cached
+    return (*dataset, info)
+
+
+def load_dataset(symbol, interval, key):
+    """Training windows of an existing cache entry; FileNotFoundError once it was evicted"""
+    scaled_data, scaler, meta = _load(dataset_dir(symbol, interval, key))
+    feature_columns = meta["features"]
+    X, y = make_sequences(
+        scaled_data, meta["sequence_length"], meta["prediction_horizon"], feature_columns.index('close')
+    )
+    train_size = meta["train_size"]
+    info = {"key": key, "data_version": meta["data_version"], "cached": True, "samples": meta["samples"]}
+    return X[:train_size], X[train_size:], y[:train_size], y[train_size:], scaler, feature_columns, info
@@ -1,17 +1,17 @@
 from sklearn.metrics import mean_squared_error, mean_absolute_error, r2_score
 import numpy as np
 import os
+import time
 import pandas as pd
-import matplotlib.pyplot as plt
-import joblib
+from model.artifacts import publish_bundle, bundle_dir
 def evaluate_model(model, X_test, y_test, scaler, feature_columns):
     """Evaluate model performance"""
     # Make predictions
     predictions = model.predict(X_test)
     
-    # Create dummy array for inverse scaling
-    dummy_predictions = np.zeros((len(predictions), len(feature_columns)))
-    dummy_actual = np.zeros((len(y_test), len(feature_columns)))
+    # Create dummy array for inverse scaling (one row per predicted horizon step)
+    dummy_predictions = np.zeros((predictions.size, len(feature_columns)))
+    dummy_actual = np.zeros((y_test.size, len(feature_columns)))
     
     # Place predictions and actual values in the 'close' price column (index 3)
     dummy_predictions[:, 3] = predictions.flatten()
@@ -41,70 +41,55 @@ def evaluate_model(model, X_test, y_test, scaler, feature_columns):
     return metrics, pred_prices, actual_prices
 
 
-def plot_results(history, pred_prices, actual_prices, symbol):
-    """Plot training history and predictions"""
-    fig, axes = plt.subplots(2, 2, figsize=(15, 10))
-    
-    # Training history
-    axes[0, 0].plot(history.history['loss'], label='Training Loss')
-    axes[0, 0].plot(history.history['val_loss'], label='Validation Loss')
-    axes[0, 0].set_title('Model Loss')
-    axes[0, 0].set_xlabel('Epoch')
-    axes[0, 0].set_ylabel('Loss')
-    axes[0, 0].legend()
-    
-    axes[0, 1].plot(history.history['mae'], label='Training MAE')
-    axes[0, 1].plot(history.history['val_mae'], label='Validation MAE')
-    axes[0, 1].set_title('Model MAE')
-    axes[0, 1].set_xlabel('Epoch')
-    axes[0, 1].set_ylabel('MAE')
-    axes[0, 1].legend()
-    
-    # Predictions vs Actual
-    axes[1, 0].plot(actual_prices, label='Actual', alpha=0.7)
-    axes[1, 0].plot(pred_prices, label='Predicted', alpha=0.7)
-    axes[1, 0].set_title(f'{symbol} Price Prediction')
-    axes[1, 0].set_xlabel('Time')
-    axes[1, 0].set_ylabel('Price')
-    axes[1, 0].legend()
-    
-    # Scatter plot
-    axes[1, 1].scatter(actual_prices, pred_prices, alpha=0.5)
-    axes[1, 1].plot([actual_prices.min(), actual_prices.max()], 
-                    [actual_prices.min(), actual_prices.max()], 'r--', lw=2)
-    axes[1, 1].set_xlabel('Actual Price')
-    axes[1, 1].set_ylabel('Predicted Price')
-    axes[1, 1].set_title('Actual vs Predicted Prices')
-    
-    plt.tight_layout()
-    plt.savefig(f'models/{symbol}/training_results.png', dpi=300, bbox_inches='tight')
-    plt.show()
+def measure_inference_latency(model, sequence, runs=50):
+    """p50/p95 milliseconds of a single-sequence forward pass"""
+    batch = np.asarray(sequence, dtype=np.float32)[np.newaxis]
+    model.predict_on_batch(batch)  # build the graph first
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        model.predict_on_batch(batch)
+        timings.append((time.perf_counter() - start) * 1000)
+    p50, p95 = np.percentile(timings, [50, 95])
+    return {"inference_ms_p50": round(float(p50), 3), "inference_ms_p95": round(float(p95), 3)}
 
-def save_model_artifacts(model, scaler, feature_columns, metrics, symbol, model_dir):
-    """Save all model artifacts"""
-    # Save the trained model
-    model.save(f"{model_dir}/lstm_model.h5")
-    
-    # Save the scaler
-    joblib.dump(scaler, f"{model_dir}/scaler.pkl")
-    
-    # Save feature columns
-    joblib.dump(feature_columns, f"{model_dir}/feature_columns.pkl")
-    
-    # Save metrics
-    joblib.dump(metrics, f"{model_dir}/metrics.pkl")
-    
-    # Save model summary
-    with open(f"{model_dir}/model_summary.txt", 'w') as f:
-        model.summary(print_fn=lambda x: f.write(x + '\n'))
-    
-    # Save training info
-    training_info = {
-        'symbol': symbol,
-        'features': feature_columns,
-        'metrics': metrics,
-        'model_architecture': 'LSTM with technical indicators'
+
+def model_profile(model, history, architecture, sequence, initial_epoch=0, measured_with=None):
+    """Cost of a trained model: size, training time per epoch and serving latency
+
+    `initial_epoch` counts the epochs run before a resume, which `history`
+    does not cover. `measured_with` records the CPU budget the latency was
+    measured under, when that is not the serving one.
+    """
+    epoch_seconds = history.history.get("epoch_seconds", [])
+    return {
+        "architecture": architecture,
+        "param_count": int(model.count_params()),
+        "epochs_trained": initial_epoch + len(history.epoch),
+        "epoch_seconds": round(float(np.mean(epoch_seconds)), 3) if epoch_seconds else None,
+        **measure_inference_latency(model, sequence),
+        "inference_measured_with": measured_with,
     }
-    joblib.dump(training_info, f"{model_dir}/training_info.pkl")
-    
-    print(f"Model artifacts saved in: {model_dir}")
+
+
+def report_data(history, pred_prices, actual_prices):
+    """Series the training report is drawn from, stored with the bundle"""
+    data = {k: v for k, v in history.history.items() if k in ("loss", "val_loss", "mae", "val_mae")}
+    data.update(pred_prices=pred_prices, actual_prices=actual_prices)
+    return data
+
+
+def plot_results(history, pred_prices, actual_prices, symbol):
+    """Plot training history and predictions to LSTM_models/{symbol}/training_results.png"""
+    from model.report import render_report
+
+    path = f"LSTM_models/{symbol}/training_results.png"
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    render_report(report_data(history, pred_prices, actual_prices), symbol, path)
+    return path
+
+def save_model_artifacts(model, scaler, feature_columns, metrics, symbol, extra=None, report_data=None):
+    """Publish all model artifacts as a new versioned bundle"""
+    manifest = publish_bundle(model, scaler, feature_columns, metrics, symbol, extra=extra, report_data=report_data)
+    print(f"Model artifacts saved in: {bundle_dir(symbol, manifest['version'])}")
+    return manifest
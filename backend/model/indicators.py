@@ -0,0 +1,196 @@
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+# Registry of derived features: name -> (dependencies, function).
+# A function receives its dependencies in declaration order, each a Series
+# (one symbol) or a DataFrame with one column per symbol, and returns the
+# same shape. Names that are not registered are read from the input frame.
+INDICATORS = {}
+
+PRICE_VOLUME_COLUMNS = ['open', 'high', 'low', 'close', 'volume']
+
+# Columns added by create_technical_indicators, in their historical order
+TECHNICAL_INDICATORS = [
+    'SMA_5', 'SMA_20', 'EMA_12', 'RSI',
+    'BB_middle', 'BB_upper', 'BB_lower',
+    'MACD', 'MACD_signal',
+    'volume_sma', 'volume_ratio',
+    'volatility', 'price_change',
+]
+
+
+def indicator(name, *depends):
+    """Register the decorated function as the way to compute `name`"""
+    def register(fn):
+        INDICATORS[name] = (depends, fn)
+        return fn
+    return register
+
+
+# Moving averages
+@indicator('SMA_5', 'close')
+def _sma_5(close):
+    return close.rolling(window=5).mean()
+
+
+@indicator('SMA_20', 'close')
+def _sma_20(close):
+    return close.rolling(window=20).mean()
+
+
+@indicator('EMA_12', 'close')
+def _ema_12(close):
+    return close.ewm(span=12).mean()
+
+
+@indicator('EMA_26', 'close')
+def _ema_26(close):
+    return close.ewm(span=26).mean()
+
+
+# Relative Strength Index
+@indicator('close_diff', 'close')
+def _close_diff(close):
+    return close.diff()
+
+
+@indicator('RSI', 'close', 'close_diff')
+def _rsi(close, delta):
+    # Bars before a symbol's first close (panel padding) stay missing rather
+    # than counting as unchanged, so they never enter the rolling window.
+    missing = close.isna()
+    gain = (delta.where(delta > 0, 0)).mask(missing).rolling(window=14).mean()
+    loss = (-delta.where(delta < 0, 0)).mask(missing).rolling(window=14).mean()
+    rs = gain / loss
+    return 100 - (100 / (1 + rs))
+
+
+# Bollinger Bands and volatility share the 20 bar standard deviation
+@indicator('close_std_20', 'close')
+def _close_std_20(close):
+    return close.rolling(window=20).std()
+
+
+@indicator('BB_middle', 'SMA_20')
+def _bb_middle(sma_20):
+    return sma_20
+
+
+@indicator('BB_upper', 'SMA_20', 'close_std_20')
+def _bb_upper(sma_20, std_20):
+    return sma_20 + (std_20 * 2)
+
+
+@indicator('BB_lower', 'SMA_20', 'close_std_20')
+def _bb_lower(sma_20, std_20):
+    return sma_20 - (std_20 * 2)
+
+
+@indicator('volatility', 'close_std_20')
+def _volatility(std_20):
+    return std_20
+
+
+# MACD
+@indicator('MACD', 'EMA_12', 'EMA_26')
+def _macd(ema_12, ema_26):
+    return ema_12 - ema_26
+
+
+@indicator('MACD_signal', 'MACD')
+def _macd_signal(macd):
+    return macd.ewm(span=9).mean()
+
+
+# Volume
+@indicator('volume_sma', 'volume')
+def _volume_sma(volume):
+    return volume.rolling(window=20).mean()
+
+
+@indicator('volume_ratio', 'volume', 'volume_sma')
+def _volume_ratio(volume, volume_sma):
+    return volume / volume_sma
+
+
+@indicator('price_change', 'close')
+def _price_change(close):
+    return close.pct_change()
+
+
+def resolve(name, source, values):
+    """Value of `name`, computing its dependencies first; `values` memoizes across calls"""
+    if name not in values:
+        if name in INDICATORS:
+            depends, fn = INDICATORS[name]
+            values[name] = fn(*(resolve(dep, source, values) for dep in depends))
+        else:
+            values[name] = source(name)
+    return values[name]
+
+
+def required_indicators(feature_columns):
+    """Every registered indicator that computing `feature_columns` touches"""
+    needed = set()
+    pending = [name for name in feature_columns if name in INDICATORS]
+    while pending:
+        name = pending.pop()
+        if name not in needed:
+            needed.add(name)
+            pending.extend(dep for dep in INDICATORS[name][0] if dep in INDICATORS)
+    return needed
+
+
+def compute_features(df, feature_columns, out=None):
+    """(rows, features) float64 array of `feature_columns` computed from an OHLCV frame
+
+    Only the requested columns and what they depend on are computed; shared
+    intermediates are computed once. `df` is left untouched.
+    """
+    if out is None:
+        out = np.empty((len(df), len(feature_columns)), dtype=np.float64)
+    values = {}
+    for j, name in enumerate(feature_columns):
+        out[:, j] = resolve(name, lambda column: df[column], values)
+    return out
+
+
+def _compute_panel_chunk(fields, feature_columns):
+    n_symbols, n_bars = next(iter(fields.values())).shape
+    out = np.empty((n_symbols, n_bars, len(feature_columns)), dtype=np.float64)
+    # Time runs down the rows and each symbol is a column, so every rolling
+    # and EWM kernel sweeps all symbols in one call, exactly as it would a Series.
+    source = lambda column: pd.DataFrame(np.asarray(fields[column], dtype=np.float64).T)
+    values = {}
+    for j, name in enumerate(feature_columns):
+        out[:, :, j] = resolve(name, source, values).to_numpy().T
+    return out
+
+
+def compute_panel(fields, feature_columns, workers=1):
+    """(symbols, bars, features) array of `feature_columns` for a whole universe at once
+
+    `fields` maps each OHLCV column the features need to a (symbols, bars)
+    array on a shared, ascending time axis. Symbols with a shorter history
+    are padded with leading NaNs; their rows stay NaN until enough bars exist,
+    and every symbol's slice equals compute_features on that symbol alone.
+    With `workers` > 1 the symbols are split across processes.
+    """
+    n_symbols = next(iter(fields.values())).shape[0]
+    workers = max(1, min(workers, n_symbols))
+    if workers == 1:
+        return _compute_panel_chunk(fields, feature_columns)
+
+    chunks = np.array_split(np.arange(n_symbols), workers)
+    # spawn: forking a process that has TensorFlow's thread pools running is unsafe
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context) as executor:
+        parts = executor.map(
+            _compute_panel_chunk,
+            [{name: array[chunk] for name, array in fields.items()} for chunk in chunks],
+            [feature_columns] * workers,
+        )
+        return np.concatenate(list(parts), axis=0)
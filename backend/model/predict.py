@@ -1,23 +1,103 @@
+import weakref
+
 import numpy as np
-def predict_future_prices(model, scaler, last_sequence, feature_columns, steps=10):
-    """Predict future prices"""
-    predictions = []
-    current_sequence = last_sequence.copy()
-    
-    for _ in range(steps):
-       
-        pred = model.predict(current_sequence.reshape(1, *current_sequence.shape), verbose=0)
-        
-        dummy_pred = np.zeros((1, len(feature_columns)))
-        dummy_pred[0, 3] = pred[0, 0]  #
-        
-        # Inverse transform to get actual price
-        actual_price = scaler.inverse_transform(dummy_pred)[0, 3]
-        predictions.append(actual_price)
-        
-        # Update sequence for next prediction
-        new_row = current_sequence[-1].copy()
-        new_row[3] = pred[0, 0]  # Update close price
-        current_sequence = np.vstack([current_sequence[1:], new_row])
-    
-    return predictions
\ No newline at end of file
+import tensorflow as tf
+
+PRICE_COLUMNS = ['open', 'high', 'low', 'close']
+
+
+def get_prediction_horizon(model):
+    """Number of future steps the model's output head predicts at once"""
+    return int(model.output_shape[-1])
+
+
+_mc_dropout_fns = weakref.WeakKeyDictionary()
+
+
+def mc_dropout_forward(model, batch):
+    """Forward pass with Dropout active and every other layer in inference mode"""
+    fn = _mc_dropout_fns.get(model)
+    if fn is None:
+        # A strong reference here would keep the cache key, and so every
+        # evicted model and its traced graph, alive forever
+        model_ref = weakref.ref(model)
+
+        @tf.function(reduce_retracing=True)
+        def fn(x):
+            for layer in model_ref().layers:
+                x = layer(x, training=isinstance(layer, tf.keras.layers.Dropout))
+            return x
+        _mc_dropout_fns[model] = fn
+    return fn(tf.convert_to_tensor(batch, dtype=tf.float32)).numpy()
+
+
+def forecast_mode(prediction_horizon, steps):
+    """How a forecast of `steps` is produced by a model with this horizon"""
+    if prediction_horizon >= steps:
+        return "direct"
+    if prediction_horizon > 1:
+        return "direct+autoregressive"
+    return "autoregressive"
+
+
+def roll_forecast(predict, scaler, sequences, feature_columns, steps, prediction_horizon):
+    """Forecast `steps` closes for a batch of scaled sequences (batch, time, features).
+
+    Each forward pass yields `prediction_horizon` closes. Only when more steps
+    are requested than the model was trained for, the predicted bars are
+    appended to the window and the model is run again.
+    """
+    close_idx = feature_columns.index('close')
+    price_idx = [feature_columns.index(col) for col in PRICE_COLUMNS if col in feature_columns]
+    sequences = np.array(sequences, dtype=np.float64)
+    batch_size = len(sequences)
+
+    closes = np.empty((batch_size, 0))
+    while closes.shape[1] < steps:
+        pred = np.asarray(predict(sequences)).reshape(batch_size, -1)[:, :prediction_horizon]
+        pred = pred[:, :steps - closes.shape[1]]
+        prices = (pred - scaler.min_[close_idx]) / scaler.scale_[close_idx]
+        closes = np.hstack([closes, prices])
+        if closes.shape[1] >= steps:
+            break
+
+        # Predicted bars: every price column takes the predicted close, the
+        # remaining indicators are carried over from the last observed bar.
+        new_rows = np.repeat(sequences[:, -1:, :], pred.shape[1], axis=1)
+        for idx in price_idx:
+            new_rows[:, :, idx] = prices * scaler.scale_[idx] + scaler.min_[idx]
+        sequences = np.concatenate([sequences[:, pred.shape[1]:, :], new_rows], axis=1)
+
+    return closes
+
+
+def predict_future_prices(model, scaler, last_sequence, feature_columns, steps=10, predict_fn=None,
+                          prediction_horizon=None):
+    """Predict future prices
+
+    `predict_fn(batch)` runs the forward pass; defaults to `model.predict`.
+    Multi-horizon models return all their horizons from a single pass.
+    """
+    predict = predict_fn or (lambda batch: model.predict(batch, verbose=0))
+    horizon = prediction_horizon or get_prediction_horizon(model)
+    closes = roll_forecast(predict, scaler, last_sequence[np.newaxis], list(feature_columns), steps, horizon)
+    return list(closes[0])
+
+
+def sample_future_prices(model, scaler, last_sequence, feature_columns, steps=10, samples=100,
+                         predict_fn=None, prediction_horizon=None):
+    """Monte Carlo dropout forecast: (samples, steps) array of sampled closes
+
+    All samples advance together, so each step is one batched forward pass of
+    `samples` rows rather than `samples` separate calls.
+    """
+    predict = predict_fn or (lambda batch: mc_dropout_forward(model, batch))
+    horizon = prediction_horizon or get_prediction_horizon(model)
+    sequences = np.repeat(last_sequence[np.newaxis], samples, axis=0)
+    return roll_forecast(predict, scaler, sequences, list(feature_columns), steps, horizon)
+
+
+def summarize_samples(sampled):
+    """Per-step mean and 5th/95th percentiles of sampled forecasts"""
+    p5, p95 = np.percentile(sampled, [5, 95], axis=0)
+    return {"mean": sampled.mean(axis=0), "p5": p5, "p95": p95}
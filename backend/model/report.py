@@ -0,0 +1,94 @@
+"""Training report: loss curves and predicted vs actual prices of a bundle.
+
+Drawn with the Agg backend through the object-oriented Figure API, so it
+needs no display and keeps no global pyplot state between renders.
+"""
+import os
+import uuid
+
+import numpy as np
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+
+from core.cpu import exit_with_parent, pin_process
+from model.artifacts import bundle_dir, REPORT_DATA_FILE, REPORT_FILE
+
+# Longest series drawn as is; longer ones are reduced to about this many points
+REPORT_MAX_POINTS = int(os.getenv("REPORT_MAX_POINTS", "2000"))
+REPORT_DPI = int(os.getenv("REPORT_DPI", "100"))
+
+
+def init_render_worker(cpus=None, nice=0):
+    """Initializer of a render worker process: pinned like training, and gone with the API process"""
+    exit_with_parent()
+    pin_process(cpus, nice)
+
+
+def downsample(values, max_points=REPORT_MAX_POINTS):
+    """Indices that keep the min and max of each of max_points/2 buckets
+
+    Unlike a plain stride, spikes stay visible in the line plot.
+    """
+    n = len(values)
+    if n <= max_points:
+        return np.arange(n)
+    buckets = np.array_split(np.arange(n), max(1, max_points // 2))
+    keep = set()
+    for bucket in buckets:
+        chunk = values[bucket]
+        keep.add(bucket[np.argmin(chunk)])
+        keep.add(bucket[np.argmax(chunk)])
+    return np.fromiter(sorted(keep), dtype=np.int64)
+
+
+def render_report(data, symbol, path, max_points=REPORT_MAX_POINTS, dpi=REPORT_DPI):
+    """Draw the 4-panel training report from `data` (see evaluate_model.report_data) to `path`"""
+    fig = Figure(figsize=(15, 10))
+    FigureCanvasAgg(fig)
+    axes = fig.subplots(2, 2)
+
+    for ax, metric, label in ((axes[0, 0], "loss", "Loss"), (axes[0, 1], "mae", "MAE")):
+        if metric in data:
+            ax.plot(data[metric], label=f"Training {label}")
+        if f"val_{metric}" in data:
+            ax.plot(data[f"val_{metric}"], label=f"Validation {label}")
+        ax.set_title(f"Model {label}")
+        ax.set_xlabel("Epoch")
+        ax.set_ylabel(label)
+        ax.legend()
+
+    actual, predicted = np.asarray(data["actual_prices"]), np.asarray(data["pred_prices"])
+    index = np.union1d(downsample(actual, max_points), downsample(predicted, max_points))
+    axes[1, 0].plot(index, actual[index], label="Actual", alpha=0.7)
+    axes[1, 0].plot(index, predicted[index], label="Predicted", alpha=0.7)
+    axes[1, 0].set_title(f"{symbol} Price Prediction")
+    axes[1, 0].set_xlabel("Time")
+    axes[1, 0].set_ylabel("Price")
+    axes[1, 0].legend()
+
+    # A stride is enough for the scatter; it only shows the spread
+    step = max(1, len(actual) // max_points)
+    axes[1, 1].scatter(actual[::step], predicted[::step], alpha=0.5, s=8)
+    axes[1, 1].plot([actual.min(), actual.max()], [actual.min(), actual.max()], "r--", lw=2)
+    axes[1, 1].set_xlabel("Actual Price")
+    axes[1, 1].set_ylabel("Predicted Price")
+    axes[1, 1].set_title("Actual vs Predicted Prices")
+
+    fig.tight_layout()
+    fig.savefig(path, dpi=dpi, format="png")
+
+
+def render_bundle_report(symbol, version):
+    """Render the report of a published bundle into its directory; returns the path"""
+    directory = bundle_dir(symbol, version)
+    with np.load(directory / REPORT_DATA_FILE) as f:
+        data = {name: f[name] for name in f.files}
+
+    path = directory / REPORT_FILE
+    tmp_path = directory / f".{REPORT_FILE}.{uuid.uuid4().hex[:6]}.tmp"
+    try:
+        render_report(data, symbol, tmp_path)
+        os.replace(tmp_path, path)
+    finally:
+        tmp_path.unlink(missing_ok=True)
+    return str(path)
@@ -54,7 +54,7 @@ def main():
         
         # Train model
         print("Training model...")
-        history, model_dir = train_model(
+        history = train_model(
             model, X_train, y_train, X_test, y_test, SYMBOL, epochs=EPOCHS
         )
         
@@ -72,7 +72,7 @@ def main():
         plot_results(history, pred_prices, actual_prices, SYMBOL)
         
         # Save model artifacts
-        save_model_artifacts(model, scaler, feature_columns, metrics, SYMBOL, model_dir)
+        manifest = save_model_artifacts(model, scaler, feature_columns, metrics, SYMBOL, extra={"interval": INTERVAL, "prediction_horizon": PREDICTION_HORIZON})
         
         # Predict future prices
         print("\nPredicting next 10 time steps...")
@@ -86,7 +86,7 @@ def main():
             print(f"Step {i}: ${price:.2f}")
         
         print(f"\nTraining completed successfully!")
-        print(f"Model saved in: {model_dir}")
+        print(f"Model saved in: LSTM_models/{SYMBOL}/versions/{manifest['version']}")
         
     except Exception as e:
         print(f"Error: {str(e)}")
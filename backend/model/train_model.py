@@ -1,12 +1,189 @@
 import os
-from tensorflow.keras.callbacks import EarlyStopping, ReduceLROnPlateau, ModelCheckpoint
-def train_model(model, X_train, y_train, X_test, y_test, symbol, epochs=100):
-    """Train the LSTM model with callbacks"""
-    # Create model directory
-    model_dir = f"LSTM_models/{symbol}"
-    os.makedirs(model_dir, exist_ok=True)
-    
-    # Callbacks
+import math
+import time
+import numpy as np
+from tensorflow.keras.callbacks import Callback, EarlyStopping, ReduceLROnPlateau
+from tensorflow.keras.utils import Sequence
+
+
+class TrainingBudget(Callback):
+    """Stops a fit cleanly once `max_seconds` of training time are spent
+
+    Checked after every batch; the epoch that runs out still gets its
+    validation pass. The best weights early stopping kept are restored, and
+    `stopped_by` says what ended the run ("wall_clock", "early_stopping" or
+    "epochs"). `seconds_used` is checkpointed, so a resumed run continues
+    the same budget.
+    """
+
+    def __init__(self, max_seconds=None):
+        super().__init__()
+        self.max_seconds = max_seconds
+        self.seconds_used = 0.0
+        self.stopped_by = None
+        self.early_stopping = None
+
+    def watch(self, callbacks):
+        self.early_stopping = next((c for c in callbacks if isinstance(c, EarlyStopping)), None)
+
+    def _tick(self):
+        now = time.perf_counter()
+        self.seconds_used += now - self._last
+        self._last = now
+
+    def on_train_begin(self, logs=None):
+        self._last = time.perf_counter()
+
+    def on_train_batch_end(self, batch, logs=None):
+        self._tick()
+        if self.max_seconds and self.seconds_used >= self.max_seconds:
+            self.stopped_by = "wall_clock"
+            self.model.stop_training = True
+
+    def on_epoch_end(self, epoch, logs=None):
+        self._tick()
+
+    def on_train_end(self, logs=None):
+        self._tick()
+        early_stopping = self.early_stopping
+        if self.stopped_by is None:
+            self.stopped_by = "early_stopping" if early_stopping is not None and early_stopping.stopped_epoch else "epochs"
+        elif early_stopping is not None and early_stopping.restore_best_weights and early_stopping.best_weights is not None:
+            # Older Keras only restores them when early stopping ended the run itself
+            self.model.set_weights(early_stopping.best_weights)
+
+
+class SampledWindows(Sequence):
+    """A fresh random subset of `samples_per_epoch` training windows every epoch
+
+    Caps the cost of an epoch on long histories while still visiting all of
+    the data over the run; batches are gathered from the (memory-mapped)
+    arrays on demand.
+    """
+
+    def __init__(self, X, y, samples_per_epoch, batch_size=32, seed=None):
+        super().__init__()
+        self.X, self.y = X, y
+        self.samples_per_epoch = min(samples_per_epoch, len(X))
+        self.batch_size = batch_size
+        self.rng = np.random.default_rng(seed)
+        self.on_epoch_end()
+
+    def __len__(self):
+        return math.ceil(self.samples_per_epoch / self.batch_size)
+
+    def __getitem__(self, i):
+        index = self.index[i * self.batch_size:(i + 1) * self.batch_size]
+        return self.X[index], self.y[index]
+
+    def on_epoch_end(self):
+        self.index = self.rng.choice(len(self.X), self.samples_per_epoch, replace=False)
+
+
+class ResumableCheckpoint(Callback):
+    """Saves everything needed to continue an interrupted fit after each epoch
+
+    The full model, optimizer state included, goes to `checkpoint_path` and
+    the best weights so far to `best_weights_path`. The counters of the
+    early stopping, LR schedule and budget callbacks are handed to
+    `on_checkpoint(epochs_done, state)` to be persisted; passing that state
+    back in restores them on resume.
+    """
+
+    # Attributes that make up each watched callback's progress
+    STATE_ATTRS = {
+        EarlyStopping: ("wait", "best", "best_epoch"),
+        ReduceLROnPlateau: ("wait", "best", "cooldown_counter"),
+        TrainingBudget: ("seconds_used",),
+    }
+
+    def __init__(self, checkpoint_path, best_weights_path, on_checkpoint, state=None):
+        super().__init__()
+        self.checkpoint_path = str(checkpoint_path)
+        self.best_weights_path = str(best_weights_path)
+        self.on_checkpoint = on_checkpoint
+        self.state = state or {}
+        self.watched = {}
+
+    def watch(self, callbacks):
+        for callback in callbacks:
+            if type(callback) in self.STATE_ATTRS:
+                self.watched[type(callback).__name__] = callback
+
+    def on_train_begin(self, logs=None):
+        # Runs after the watched callbacks have reset themselves
+        for name, callback in self.watched.items():
+            for attr, value in self.state.get(name, {}).items():
+                setattr(callback, attr, value)
+
+        early_stopping = self.watched.get("EarlyStopping")
+        if early_stopping is not None and self.state and os.path.exists(self.best_weights_path):
+            with np.load(self.best_weights_path) as f:
+                early_stopping.best_weights = [f[f"arr_{i}"] for i in range(len(f.files))]
+
+    def on_epoch_end(self, epoch, logs=None):
+        early_stopping = self.watched.get("EarlyStopping")
+        if early_stopping is not None and early_stopping.best_epoch == epoch:
+            tmp_path = f"{self.best_weights_path}.tmp.npz"
+            np.savez(tmp_path, *self.model.get_weights())
+            os.replace(tmp_path, self.best_weights_path)
+
+        tmp_path = f"{self.checkpoint_path}.tmp.keras"
+        self.model.save(tmp_path)
+        os.replace(tmp_path, self.checkpoint_path)
+
+        state = {
+            name: {attr: _plain(getattr(callback, attr)) for attr in self.STATE_ATTRS[type(callback)]}
+            for name, callback in self.watched.items()
+        }
+        self.on_checkpoint(epoch + 1, state)
+
+
+class MemoryGuard(Callback):
+    """Checks RSS after every batch so a fit over the memory ceiling fails
+    with MemoryCeilingExceeded instead of being OOM-killed"""
+
+    def __init__(self, tracker, stage="fit"):
+        super().__init__()
+        self.tracker = tracker
+        self.stage = stage
+
+    def on_train_batch_end(self, batch, logs=None):
+        self.tracker.check(self.stage)
+
+    def on_test_batch_end(self, batch, logs=None):
+        self.tracker.check(self.stage)
+
+
+class EpochTimer(Callback):
+    """Adds the wall time of each epoch to the logs, so it ends up in the history"""
+
+    def on_epoch_begin(self, epoch, logs=None):
+        self.start = time.perf_counter()
+
+    def on_epoch_end(self, epoch, logs=None):
+        if logs is not None:
+            logs["epoch_seconds"] = time.perf_counter() - self.start
+
+
+def _plain(value):
+    """JSON friendly copy of a callback counter"""
+    if value is None or isinstance(value, (int, float)):
+        return value
+    return float(value)
+
+
+def train_model(model, X_train, y_train, X_test, y_test, symbol, epochs=100, initial_epoch=0, checkpoint=None,
+                extra_callbacks=(), budget=None, samples_per_epoch=None):
+    """Train the LSTM model with callbacks
+
+    `checkpoint` (a ResumableCheckpoint) makes the run resumable; with
+    `initial_epoch` > 0 it continues a run from its saved state. `budget`
+    (a TrainingBudget) caps the training time and `samples_per_epoch` the
+    windows seen per epoch.
+    """
+    # Callbacks; the best weights come back through EarlyStopping, and
+    # artifacts are only written once, as a bundle, after evaluation
     callbacks = [
         EarlyStopping(
             monitor='val_loss',
@@ -21,22 +198,29 @@ def train_model(model, X_train, y_train, X_test, y_test, symbol, epochs=100):
             min_lr=0.0001,
             verbose=1
         ),
-        ModelCheckpoint(
-            filepath=f"{model_dir}/best_model.h5",
-            monitor='val_loss',
-            save_best_only=True,
-            verbose=1
-        )
+        EpochTimer(),
+        *extra_callbacks
     ]
-    
+    if budget is not None:
+        budget.watch(callbacks)
+        callbacks.append(budget)
+    if checkpoint is not None:
+        checkpoint.watch(callbacks)
+        callbacks.append(checkpoint)
+
+    if samples_per_epoch and samples_per_epoch < len(X_train):
+        train_data = {"x": SampledWindows(X_train, y_train, samples_per_epoch, batch_size=32)}
+    else:
+        train_data = {"x": X_train, "y": y_train, "batch_size": 32}
+
     # Train model
     history = model.fit(
-        X_train, y_train,
-        batch_size=32,
+        **train_data,
         epochs=epochs,
+        initial_epoch=initial_epoch,
         validation_data=(X_test, y_test),
         callbacks=callbacks,
         verbose=1
     )
-    
-    return history, model_dir
+
+    return history
@@ -0,0 +1,134 @@
+"""Entry point of the process a training run executes in.
+
+Started with the spawn method so it gets a fresh TensorFlow runtime whose
+thread pools and CPU affinity are sized for training alone. It never touches
+the shared state itself: progress goes back to the API process as
+(kind, payload) events on a queue.
+"""
+import os
+
+from contextlib import nullcontext
+
+from core.cpu import available_cpus, configure_tf_threads, exit_with_parent, pin_process
+from core.memory import MemoryTracker
+from core.profiling import profiled
+
+
+def run_training(job, events, cpu_budget, memory_limits=None):
+    """Train, evaluate and publish the model described by `job`
+
+    Events: ("checkpoint", {"epoch", "callbacks"}) after every epoch,
+    ("status", fields), ("memory", stages) after every stage, then
+    ("done", result) or ("error", message). With job["profile_run"] the run
+    is profiled and the result names the file under state/profiles.
+    """
+    # An orphaned run would race the one resumed after the restart
+    exit_with_parent()
+    # Nothing else runs here, so per-stage peaks are exact
+    memory = MemoryTracker(exclusive=True, **(memory_limits or {}))
+    try:
+        pin_process(cpu_budget.get("cpus"), cpu_budget.get("nice", 0))
+        configure_tf_threads(cpu_budget.get("intra_op_threads"), cpu_budget.get("inter_op_threads"))
+        with profiled("train", job["symbol"]) if job.get("profile_run") else nullcontext() as profile_path:
+            result = _train(job, events, memory, cpu_budget)
+        if profile_path is not None:
+            result["profile_file"] = profile_path.name
+        events.put(("done", result))
+    except Exception as e:
+        # Includes the stage that failed, e.g. on MemoryCeilingExceeded
+        events.put(("memory", memory.stages))
+        events.put(("error", f"{type(e).__name__}: {e}"))
+
+
+def _report_checkpoint(events, parent, epochs_done, state):
+    if os.getppid() != parent:
+        # API process gone (no PR_SET_PDEATHSIG here); the checkpoint is on disk
+        os._exit(1)
+    events.put(("checkpoint", {"epoch": epochs_done, "callbacks": state}))
+
+
+def _train(job, events, memory, cpu_budget):
+    import tensorflow as tf
+    from model.LSTM import build_model
+    from model.dataset_cache import load_dataset
+    from model.evaluate_model import evaluate_model, model_profile, report_data, save_model_artifacts
+    from model.train_model import MemoryGuard, ResumableCheckpoint, TrainingBudget, train_model
+
+    tf.config.set_visible_devices([], 'GPU')
+    symbol = job["symbol"]
+    parent = os.getppid()
+
+    with memory.stage("load_dataset"):
+        X_train, X_test, y_train, y_test, scaler, feature_columns, dataset = load_dataset(
+            symbol, job["interval"], job["dataset"]["key"]
+        )
+    with memory.stage("build_model"):
+        if job["epoch"] > 0:
+            # Weights and optimizer state as of the last finished epoch
+            model = tf.keras.models.load_model(job["checkpoint_path"])
+        else:
+            model = build_model(
+                job["architecture"],
+                input_shape=(X_train.shape[1], X_train.shape[2]),
+                prediction_horizon=job["prediction_horizon"]
+            )
+    events.put(("memory", memory.stages))
+
+    checkpoint = ResumableCheckpoint(
+        job["checkpoint_path"],
+        job["best_weights_path"],
+        lambda epochs_done, state: _report_checkpoint(events, parent, epochs_done, state),
+        state=job["callbacks"]
+    )
+    limits = job.get("budget") or {}
+    budget = TrainingBudget(limits.get("max_seconds"))
+    samples_per_epoch = limits.get("max_samples_per_epoch")
+    with memory.stage("fit"):
+        history = train_model(
+            model, X_train, y_train, X_test, y_test, symbol, epochs=job["epochs"],
+            initial_epoch=job["epoch"], checkpoint=checkpoint, extra_callbacks=[MemoryGuard(memory)],
+            budget=budget, samples_per_epoch=samples_per_epoch
+        )
+    events.put(("memory", memory.stages))
+    budget_report = {
+        "max_seconds": limits.get("max_seconds"),
+        "seconds_used": round(budget.seconds_used, 1),
+        "max_epochs": job["epochs"],
+        "epochs_run": job["epoch"] + len(history.epoch),
+        "max_samples_per_epoch": samples_per_epoch,
+        "samples_per_epoch": min(samples_per_epoch or len(X_train), len(X_train)),
+        "stopped_by": budget.stopped_by,
+    }
+
+    events.put(("status", {"message": "Evaluating model...", "progress": 90.0}))
+    with memory.stage("evaluate"):
+        metrics, pred_prices, actual_prices = evaluate_model(model, X_test, y_test, scaler, feature_columns)
+
+        # Size, training and serving cost, to weigh against the metrics
+        # Timed under this process's training budget, which cannot be lifted
+        # once TensorFlow's thread pools exist; recorded next to the numbers
+        profile = model_profile(
+            model, history, job["architecture"], X_test[-1], initial_epoch=job["epoch"],
+            measured_with={**cpu_budget, "cpus": available_cpus()}
+        )
+
+    with memory.stage("publish"):
+        manifest = save_model_artifacts(
+            model, scaler, feature_columns, metrics, symbol,
+            extra={
+                "interval": job["interval"],
+                "prediction_horizon": job["prediction_horizon"],
+                "model_architecture": job["architecture"],
+                "profile": profile,
+                "budget": budget_report
+            },
+            # Rendered later by the report job, not here
+            report_data=report_data(history, pred_prices, actual_prices)
+        )
+    events.put(("memory", memory.stages))
+    return {
+        "metrics": {k: float(v) for k, v in metrics.items()},
+        "profile": profile,
+        "budget": budget_report,
+        "version": manifest["version"]
+    }
@@ -10,7 +10,7 @@ def fetch_stock_data(api_key, symbol="AAPL", interval="5min"):
     Fetch intraday stock data from Alpha Vantage API
     Valid intervals: 1min, 5min, 15min, 30min, 60min
     """
-    url = 'https://www.alphavantage.co/query'
+    url = os.getenv("ALPHA_VANTAGE_URL", 'https://www.alphavantage.co/query')
     
     # Valid intraday intervals
     valid_intervals = ['1min', '5min', '15min', '30min', '60min']
@@ -0,0 +1,19 @@
+import asyncio
+import time
+
+
+class RateLimiter:
+    """Spaces calls evenly so no more than `calls_per_minute` start per minute"""
+
+    def __init__(self, calls_per_minute):
+        self.spacing = 60.0 / calls_per_minute
+        self._next_slot = 0.0
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        """Wait for the next free slot"""
+        async with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + self.spacing
+        await asyncio.sleep(slot - now)
@@ -0,0 +1,40 @@
+import pandas as pd
+
+INTERVAL_MINUTES = {"1min": 1, "5min": 5, "15min": 15, "30min": 30, "60min": 60}
+
+OHLCV_AGGREGATION = {
+    'open': 'first',
+    'high': 'max',
+    'low': 'min',
+    'close': 'last',
+    'volume': 'sum',
+}
+
+
+def can_resample(source_interval, target_interval):
+    """True if bars at `target_interval` can be built from `source_interval` bars"""
+    source = INTERVAL_MINUTES[source_interval]
+    target = INTERVAL_MINUTES[target_interval]
+    return target >= source and target % source == 0
+
+
+def resample_ohlcv(df, source_interval, target_interval):
+    """Aggregate OHLCV bars to a coarser interval.
+
+    Buckets are labelled by their start like the upstream bars. Buckets with no
+    source bars (overnight, halts) are dropped instead of being filled, and a
+    trailing bucket that is still forming is left out.
+    """
+    if source_interval == target_interval:
+        return df
+    if not can_resample(source_interval, target_interval):
+        raise ValueError(f"Cannot build {target_interval} bars from {source_interval} bars")
+
+    rule = f"{INTERVAL_MINUTES[target_interval]}min"
+    grouped = df.resample(rule, label='left', closed='left')
+    bars = grouped.agg(OHLCV_AGGREGATION)
+    bars = bars[grouped['close'].count() > 0]
+
+    source_end = df.index[-1] + pd.Timedelta(minutes=INTERVAL_MINUTES[source_interval])
+    complete = bars.index + pd.Timedelta(rule) <= source_end
+    return bars[complete]